@@ -0,0 +1,352 @@
+"""
+바코드 디코딩 (CPU 작업만 담당하는 부작용 없는 함수)
+- thread 모드: detector 에서 직접 호출
+- process 모드: procpool 워커 프로세스에서 호출 (이 모듈만 import 되므로 가볍게 유지)
+
+디코더 캐스케이드
+- 단계(stage)를 비용 순서대로 실행하고, 처음 성공한 단계에서 종료
+- 기본 순서 (config.BARCODE_DECODER_STAGES): fast → full → enhanced
+  - fast     : JPEG 를 축소 그레이스케일로 바로 디코딩(IMREAD_REDUCED_GRAYSCALE_*) → ROI 만 pyzbar
+  - full     : 원본 해상도 ROI pyzbar
+  - enhanced : 대비 보정 후 pyzbar
+  - sharpen  : 언샤프 마스크 후 pyzbar
+  - rotated  : ±30도 회전 후 pyzbar
+  - opencv   : OpenCV barcode.BarcodeDetector
+- 축소 패스 이후 단계들은 ROI 안에 바코드 후보(그래디언트 영역)가 있을 때만 실행
+- 결과 좌표는 항상 원본 프레임 기준, 단계별 (이름, 소요 시간, 성공 여부) trace 를 함께 반환
+"""
+import time
+import threading
+from abc import ABC, abstractmethod
+from collections import namedtuple
+import cv2
+import numpy as np
+
+try:
+    from pyzbar import pyzbar
+except Exception:
+    pyzbar = None
+
+# pyzbar 결과와 같은 필드 구성 (OpenCV/회전 단계 결과도 같은 형태로 반환)
+Rect = namedtuple("Rect", "left top width height")
+Point = namedtuple("Point", "x y")
+Decoded = namedtuple("Decoded", "data type rect polygon")
+
+# 축소 배율 → imdecode 플래그 (JPEG 디코더가 DCT 단계에서 바로 축소)
+_GRAYSCALE_FLAGS = {
+    1: cv2.IMREAD_GRAYSCALE,
+    2: cv2.IMREAD_REDUCED_GRAYSCALE_2,
+    4: cv2.IMREAD_REDUCED_GRAYSCALE_4,
+    8: cv2.IMREAD_REDUCED_GRAYSCALE_8,
+}
+
+
+def has_barcode_candidate(gray):
+    """
+    바코드 후보 영역 존재 여부 (수평 그래디언트가 강한 직사각형 영역)
+    pyzbar 디코딩보다 훨씬 저렴하므로, 비싼 단계 실행 여부 판단에 사용
+    """
+    grad_x = cv2.Sobel(gray, cv2.CV_32F, 1, 0, ksize=-1)
+    grad_y = cv2.Sobel(gray, cv2.CV_32F, 0, 1, ksize=-1)
+    gradient = cv2.convertScaleAbs(cv2.subtract(grad_x, grad_y))
+    blurred = cv2.blur(gradient, (9, 9))
+    _, thresh = cv2.threshold(blurred, 225, 255, cv2.THRESH_BINARY)
+    kernel = cv2.getStructuringElement(cv2.MORPH_RECT, (21, 7))
+    closed = cv2.morphologyEx(thresh, cv2.MORPH_CLOSE, kernel)
+    closed = cv2.dilate(cv2.erode(closed, None, iterations=4), None, iterations=4)
+
+    contours = cv2.findContours(closed, cv2.RETR_EXTERNAL, cv2.CHAIN_APPROX_SIMPLE)[-2]
+    min_area = gray.shape[0] * gray.shape[1] * 0.01
+    return any(cv2.contourArea(c) >= min_area for c in contours)
+
+
+class DecodeContext:
+    """프레임 1장의 디코딩 중간 결과 캐시 (배율별 그레이스케일 / ROI 뷰 / 후보 판정)"""
+
+    def __init__(self, frame_data, roi=None, fast_scale=1):
+        self.frame_data = frame_data
+        self.roi = roi
+        self.fast_scale = fast_scale
+        self._gray = {}
+        self._candidate = None
+
+    def gray(self, scale):
+        """배율별 그레이스케일 전체 프레임 (None 이면 디코딩 실패)"""
+        if scale not in self._gray:
+            nparr = np.frombuffer(self.frame_data, np.uint8)
+            self._gray[scale] = cv2.imdecode(nparr, _GRAYSCALE_FLAGS.get(scale, cv2.IMREAD_GRAYSCALE))
+        return self._gray[scale]
+
+    def roi_gray(self, scale):
+        """배율별 ROI 뷰와 (offset_x, offset_y). 디코딩 실패 시 (None, 0, 0)"""
+        gray = self.gray(scale)
+        if gray is None:
+            return None, 0, 0
+        if not self.roi:
+            return gray, 0, 0
+        h, w = gray.shape[:2]
+        x1, y1, x2, y2 = self.roi
+        left, top = max(0, int(w * x1)), max(0, int(h * y1))
+        right, bottom = min(w, int(w * x2)), min(h, int(h * y2))
+        if right <= left or bottom <= top:
+            return gray, 0, 0
+        return gray[top:bottom, left:right], left, top
+
+    def has_candidate(self):
+        """
+        ROI 안에 바코드 후보가 있는지 (축소 패스를 쓰는 경우에만 판정, 원본 패스만 쓰면 항상 True)
+        이미 디코딩된 가장 작은 배율 이미지로 판정
+        """
+        if self.fast_scale == 1:
+            return True
+        if self._candidate is None:
+            roi_gray, _, _ = self.roi_gray(self.fast_scale)
+            self._candidate = roi_gray is not None and has_barcode_candidate(roi_gray)
+        return self._candidate
+
+
+def _to_frame_coords(barcodes, offset_x, offset_y, scale):
+    """ROI/축소 좌표 → 원본 프레임 좌표 (bbox/신뢰도 계산이 원본 기준이므로)"""
+    if not offset_x and not offset_y and scale == 1:
+        return barcodes
+
+    mapped = []
+    for bc in barcodes:
+        rect = bc.rect
+        new_rect = type(rect)(
+            (rect.left + offset_x) * scale, (rect.top + offset_y) * scale,
+            rect.width * scale, rect.height * scale
+        )
+        new_polygon = [type(p)((p.x + offset_x) * scale, (p.y + offset_y) * scale) for p in bc.polygon]
+        mapped.append(bc._replace(rect=new_rect, polygon=new_polygon))
+    return mapped
+
+
+def _from_points(data, code_type, points, offset_x, offset_y):
+    """꼭짓점 좌표 → Decoded (원본 프레임 기준)"""
+    polygon = [Point(int(x) + offset_x, int(y) + offset_y) for x, y in points]
+    xs = [p.x for p in polygon]
+    ys = [p.y for p in polygon]
+    rect = Rect(min(xs), min(ys), max(xs) - min(xs), max(ys) - min(ys))
+    return Decoded(data, code_type, rect, polygon)
+
+
+# ===== 캐스케이드 단계 =====
+
+class DecoderStage(ABC):
+    """캐스케이드 단계 기본 클래스"""
+    name = "stage"
+    requires_candidate = False
+
+    @abstractmethod
+    def run(self, ctx):
+        """원본 프레임 좌표의 Decoded 리스트 반환 (실패 시 빈 리스트)"""
+
+
+class PyzbarStage(DecoderStage):
+    """pyzbar 단계 (배율 / 전처리 선택)"""
+
+    def __init__(self, name, scale=1, preprocess=None, requires_candidate=False):
+        self.name = name
+        self.scale = scale
+        self.preprocess = preprocess
+        self.requires_candidate = requires_candidate
+
+    def run(self, ctx):
+        roi_gray, off_x, off_y = ctx.roi_gray(self.scale)
+        if roi_gray is None:
+            return []
+        image = self.preprocess(roi_gray) if self.preprocess else roi_gray
+        return _to_frame_coords(pyzbar.decode(image), off_x, off_y, self.scale)
+
+
+class RotatedPyzbarStage(DecoderStage):
+    """기울어진 바코드용: ROI 를 회전시켜 pyzbar 재시도 후 좌표를 역회전"""
+
+    def __init__(self, name="rotated", angles=(30, -30), requires_candidate=True):
+        self.name = name
+        self.angles = angles
+        self.requires_candidate = requires_candidate
+
+    def run(self, ctx):
+        roi_gray, off_x, off_y = ctx.roi_gray(1)
+        if roi_gray is None:
+            return []
+        h, w = roi_gray.shape[:2]
+        for angle in self.angles:
+            matrix = cv2.getRotationMatrix2D((w / 2, h / 2), angle, 1.0)
+            rotated = cv2.warpAffine(roi_gray, matrix, (w, h), borderMode=cv2.BORDER_REPLICATE)
+            barcodes = pyzbar.decode(rotated)
+            if not barcodes:
+                continue
+            inverse = cv2.invertAffineTransform(matrix)
+            results = []
+            for bc in barcodes:
+                pts = np.array([[p.x, p.y] for p in bc.polygon], dtype=np.float32).reshape(-1, 1, 2)
+                original = cv2.transform(pts, inverse).reshape(-1, 2)
+                results.append(_from_points(bc.data, bc.type, original, off_x, off_y))
+            return results
+        return []
+
+
+class OpenCVBarcodeStage(DecoderStage):
+    """
+    OpenCV barcode.BarcodeDetector 단계 (OpenCV 버전에 따라 없으면 항상 실패)
+    - 캐스케이드는 카메라 워커 스레드들이 공유하므로 BarcodeDetector 는 스레드마다 1개
+    """
+
+    def __init__(self, name="opencv", requires_candidate=True):
+        self.name = name
+        self.requires_candidate = requires_candidate
+        self._local = threading.local()
+
+    def _detector(self):
+        """현재 스레드의 BarcodeDetector (처음 호출할 때 생성, 없으면 None)"""
+        if not hasattr(self._local, "detector"):
+            detector = None
+            try:
+                if hasattr(cv2, "barcode"):
+                    detector = cv2.barcode.BarcodeDetector()
+                elif hasattr(cv2, "barcode_BarcodeDetector"):
+                    detector = cv2.barcode_BarcodeDetector()
+            except Exception:
+                detector = None
+            self._local.detector = detector
+        return self._local.detector
+
+    def run(self, ctx):
+        detector = self._detector()
+        if detector is None:
+            return []
+        roi_gray, off_x, off_y = ctx.roi_gray(1)
+        if roi_gray is None:
+            return []
+
+        if hasattr(detector, "detectAndDecodeWithType"):   # OpenCV 4.8+
+            ok, infos, types, corners = detector.detectAndDecodeWithType(roi_gray)
+        else:                                               # OpenCV 4.5 ~ 4.7
+            ok, infos, types, corners = detector.detectAndDecode(roi_gray)
+        if not ok or corners is None:
+            return []
+
+        results = []
+        for info, code_type, points in zip(infos, types, corners):
+            if not info:
+                continue
+            code_type = code_type if isinstance(code_type, str) else "OPENCV"
+            results.append(_from_points(info.encode("utf-8"), code_type, points, off_x, off_y))
+        return results
+
+
+def _enhance(gray):
+    return cv2.convertScaleAbs(gray, alpha=1.1, beta=10)
+
+
+def _sharpen(gray):
+    blurred = cv2.GaussianBlur(gray, (0, 0), 3)
+    return cv2.addWeighted(gray, 1.5, blurred, -0.5, 0)
+
+
+def build_stage(name, fast_scale):
+    """단계 이름 → 단계 객체 (fast 이후 단계는 축소 패스를 쓸 때만 후보 판정 필요)"""
+    gated = fast_scale != 1
+    if name == "fast":
+        return PyzbarStage("fast", scale=fast_scale)
+    if name == "full":
+        return PyzbarStage("full", scale=1, requires_candidate=gated)
+    if name == "enhanced":
+        return PyzbarStage("enhanced", scale=1, preprocess=_enhance, requires_candidate=gated)
+    if name == "sharpen":
+        return PyzbarStage("sharpen", scale=1, preprocess=_sharpen, requires_candidate=gated)
+    if name == "rotated":
+        return RotatedPyzbarStage(requires_candidate=gated)
+    if name == "opencv":
+        return OpenCVBarcodeStage(requires_candidate=gated)
+    raise ValueError(f"알 수 없는 디코더 단계: {name}")
+
+
+class DecoderCascade:
+    """비용 순서로 단계를 실행하고 처음 성공한 단계에서 종료"""
+
+    def __init__(self, stage_names, fast_scale=1):
+        self.fast_scale = fast_scale
+        stages = [build_stage(name, fast_scale) for name in stage_names]
+        # 원본 해상도만 쓰면 fast 와 full 이 같은 작업이므로 중복 제거
+        if fast_scale == 1 and "fast" in stage_names:
+            stages = [s for s in stages if s.name != "full"]
+        self.stages = stages
+
+    def decode(self, frame_data, roi=None):
+        """(Decoded 리스트, [(단계 이름, 소요 시간, 성공 여부), ...])"""
+        ctx = DecodeContext(frame_data, roi, self.fast_scale)
+        trace = []
+        for stage in self.stages:
+            started = time.perf_counter()
+            if stage.requires_candidate and not ctx.has_candidate():
+                trace.append(("candidate_gate", time.perf_counter() - started, False))
+                break
+            barcodes = stage.run(ctx)
+            trace.append((stage.name, time.perf_counter() - started, bool(barcodes)))
+            if barcodes:
+                return barcodes, trace
+        return [], trace
+
+
+class CascadeStats:
+    """
+    단계별 실행 수 / 성공 수 / 지연 히스토그램 (메인 프로세스에서 trace 를 누적)
+    성공률이 0 에 가까운 단계는 설정에서 빼면 평균 디코딩 비용이 줄어듦
+    """
+    BUCKETS_MS = (1, 2, 5, 10, 20, 50, 100, 200)
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self._stages = {}  # name → [attempts, hits, total_sec, max_sec, histogram]
+
+    def record(self, trace):
+        with self.lock:
+            for name, elapsed, hit in trace:
+                entry = self._stages.get(name)
+                if entry is None:
+                    entry = self._stages[name] = [0, 0, 0.0, 0.0, [0] * (len(self.BUCKETS_MS) + 1)]
+                entry[0] += 1
+                entry[1] += 1 if hit else 0
+                entry[2] += elapsed
+                entry[3] = max(entry[3], elapsed)
+                elapsed_ms = elapsed * 1000
+                bucket = next((i for i, b in enumerate(self.BUCKETS_MS) if elapsed_ms <= b), len(self.BUCKETS_MS))
+                entry[4][bucket] += 1
+
+    def snapshot(self):
+        labels = [f"<={b}ms" for b in self.BUCKETS_MS] + [f">{self.BUCKETS_MS[-1]}ms"]
+        with self.lock:
+            return {
+                name: {
+                    "attempts": attempts,
+                    "hits": hits,
+                    "hit_rate": round(hits / attempts, 3) if attempts else 0,
+                    "avg_ms": round(total / attempts * 1000, 2) if attempts else 0,
+                    "max_ms": round(peak * 1000, 2),
+                    "histogram": dict(zip(labels, histogram)),
+                }
+                for name, (attempts, hits, total, peak, histogram) in self._stages.items()
+            }
+
+
+# (단계 구성, 축소 배율) → 캐스케이드 (프로세스마다 1번만 생성)
+_cascades = {}
+
+
+def decode_barcodes(frame_data, roi=None, scale=1, stages=("fast", "full", "enhanced")):
+    """
+    JPEG bytes(또는 버퍼) → (Decoded 리스트, 단계별 trace)
+    결과 좌표는 항상 원본 프레임 기준
+    """
+    if pyzbar is None:
+        return [], []
+
+    key = (tuple(stages), scale)
+    cascade = _cascades.get(key)
+    if cascade is None:
+        cascade = _cascades[key] = DecoderCascade(stages, scale)
+    return cascade.decode(frame_data, roi)
@@ -1,4 +1,3 @@
-import cv2
 import numpy as np
 import time
 import threading
@@ -11,9 +10,15 @@ from config import (
     BARCODE_COOLDOWN,
     CONFIDENCE_THRESHOLD,
     BARCODE_IMAGE_DIR,
-    SAVE_BARCODE_IMAGES
+    SAVE_BARCODE_IMAGES,
+    BARCODE_DETECTION_MODE,
+    BARCODE_DECODE_PROCESSES,
+    BARCODE_SHM_SLOT_BYTES,
+    BARCODE_DECODER_STAGES
 )
 from barcode.utils import validate_barcode_balanced, calculate_barcode_confidence_balanced
+from barcode.decoding import decode_barcodes, CascadeStats
+from barcode.image_writer import get_image_writer
 
 # 채팅 알림 on/off 플래그 (config에 없으면 기본 False)
 try:
@@ -35,13 +40,17 @@ except Exception as e:
     BARCODE_DETECTION_AVAILABLE = False
     print(f"[WARNING] ❌ pyzbar 라이브러리 오류: {e}")
 
-# 검출 히스토리 및 상태 변수
+# 검출 히스토리 (전체 카메라 공용, 대시보드 통계용)
 barcode_detection_history = deque(maxlen=500)
 barcode_detection_lock = threading.Lock()
-last_barcode_detection_time = 0
-last_detected_barcode = None
-barcode_detection_count = 0
-rejected_barcode_count = 0
+
+# 카메라별 검출기 (cam_id → BarcodeDetector)
+detectors = {}
+_detectors_lock = threading.Lock()
+
+# process 모드 디코딩 풀 (첫 검출 시 생성)
+_decode_pool = None
+_decode_pool_lock = threading.Lock()
 
 # 이미지 폴더 생성 보장
 os.makedirs(BARCODE_IMAGE_DIR, exist_ok=True)
@@ -67,168 +76,154 @@ def _compute_bbox(barcode_obj):
         return None
 
 
-def save_barcode_image(frame_data, barcode_data, bbox, product_name):
-    """
-    바코드 검출 이미지 저장 (한글 경로 문제 해결 버전)
-    """
-    if not SAVE_BARCODE_IMAGES:
-        return None
+def get_decoder():
+    """설정된 모드의 디코딩 함수 반환 (thread: 현재 스레드에서 / process: 공유 메모리 프로세스 풀)"""
+    global _decode_pool
+    if BARCODE_DETECTION_MODE != "process":
+        return decode_barcodes
 
-    try:
-        nparr = np.frombuffer(frame_data, np.uint8)
-        frame = cv2.imdecode(nparr, cv2.IMREAD_COLOR)
-        if frame is None:
-            print(f"[{datetime.datetime.now():%H:%M:%S}] [ERROR] 프레임 디코딩 실패")
-            return None
-
-        if bbox and len(bbox) == 4:
-            x1, y1, x2, y2 = map(int, bbox)
-            cv2.rectangle(frame, (x1, y1), (x2, y2), (0, 255, 0), 3)
-            cv2.putText(frame, str(barcode_data), (x1, max(0, y1 - 30)),
-                        cv2.FONT_HERSHEY_SIMPLEX, 0.8, (0, 255, 0), 2)
-            cv2.putText(frame, str(product_name), (x1, max(0, y1 - 10)),
-                        cv2.FONT_HERSHEY_SIMPLEX, 0.6, (0, 255, 0), 2)
-
-        ts = datetime.datetime.now().strftime("%Y%m%d_%H%M%S_%f")
-        filename = f"{ts}_{barcode_data}.jpg"
-        filepath = os.path.join(BARCODE_IMAGE_DIR, filename)
-
-        # --- ✨ 핵심 수정 ✨ ---
-        # cv2.imwrite 대신 imencode와 python의 open을 사용하여 한글 경로 문제를 해결합니다.
-        extension = '.jpg'
-        result, encoded_img = cv2.imencode(extension, frame, [cv2.IMWRITE_JPEG_QUALITY, 85])
-
-        if not result:
-            print(f"[{datetime.datetime.now():%H:%M:%S}] [ERROR] 이미지 인코딩 실패: {filename}")
-            return None
-        
-        with open(filepath, mode='wb') as f:
-            encoded_img.tofile(f)
-        # --- ✨ ---
+    if _decode_pool is None:
+        with _decode_pool_lock:
+            if _decode_pool is None:
+                from barcode.procpool import SharedFrameDecodePool
+                _decode_pool = SharedFrameDecodePool(BARCODE_DECODE_PROCESSES, BARCODE_SHM_SLOT_BYTES)
+                print(f"[INIT] 바코드 디코딩 프로세스 풀 시작: {BARCODE_DECODE_PROCESSES}개 프로세스")
+    return _decode_pool.decode
 
-        print(f"[{datetime.datetime.now():%H:%M:%S}] [IMAGE] 바코드 이미지 저장: {filename}")
-        return filename
-        
-    except Exception as e:
-        print(f"[{datetime.datetime.now():%H:%M:%S}] [ERROR] 바코드 이미지 저장 중 예외 발생: {e}")
-        import traceback
-        traceback.print_exc()
-        return None
 
+def get_decode_pool_stats():
+    """프로세스 풀 통계 (thread 모드면 None)"""
+    return _decode_pool.stats() if _decode_pool else None
 
-def detect_balanced_barcodes(frame_data, broadcast_fn=None):
-    """🎯 Balance 바코드 검출 (등록 제품 우선 + 안정적인 bbox 및 저장 로직)"""
-    global last_barcode_detection_time, last_detected_barcode, barcode_detection_count, rejected_barcode_count
 
-    if not BARCODE_DETECTION_AVAILABLE:
-        return []
+class BarcodeDetector:
+    """
+    카메라 1대의 바코드 검출기
+    - 검출 간격 / 쿨다운 / 통계를 카메라별로 관리 (다른 카메라와 시각을 공유하지 않음)
+    - 상태는 self.lock 으로 보호, 디코딩 자체는 락 밖에서 실행
+    """
 
-    current_time = time.time()
-    if current_time - last_barcode_detection_time < BARCODE_DETECTION_INTERVAL:
-        return []
+    def __init__(self, cam_id, roi=None, decode_scale=1, decoder_stages=BARCODE_DECODER_STAGES,
+                 interval=BARCODE_DETECTION_INTERVAL, cooldown=BARCODE_COOLDOWN,
+                 confidence_threshold=CONFIDENCE_THRESHOLD):
+        self.cam_id = str(cam_id)
+        self.roi = tuple(roi) if roi else None
+        self.decode_scale = decode_scale
+        self.decoder_stages = tuple(decoder_stages)
+        self.interval = interval
+        self.cooldown = cooldown
+        self.confidence_threshold = confidence_threshold
+
+        self.lock = threading.Lock()
+        self.last_detection_time = 0
+        self.last_detected = None  # {"data": 바코드, "time": 검출 시각}
+        self.detection_count = 0
+        self.rejected_count = 0
+        self.cascade_stats = CascadeStats()
+
+    def ready(self, now=None):
+        """검출 간격이 지나서 다음 detect() 가 실제로 디코딩하는지"""
+        with self.lock:
+            return (now or time.time()) - self.last_detection_time >= self.interval
+
+    def detect(self, frame_data, broadcast_fn=None):
+        """🎯 Balance 바코드 검출 (등록 제품 우선 + 안정적인 bbox 및 저장 로직)"""
+        if not BARCODE_DETECTION_AVAILABLE:
+            return []
+
+        current_time = time.time()
+        with self.lock:
+            if current_time - self.last_detection_time < self.interval:
+                return []
+
+        try:
+            barcodes, trace = get_decoder()(frame_data, self.roi, self.decode_scale, self.decoder_stages)
+            self.cascade_stats.record(trace)
+            if not barcodes: return []
+
+            now_str = datetime.datetime.now().strftime("%H:%M:%S")
+            print(f"[{now_str}] [BALANCE] 카메라 {self.cam_id} 검출된 바코드: {len(barcodes)}개")
+
+            registered, unregistered = [], []
+            seen, rejected_log = set(), []
+
+            for bc in barcodes:
+                try:
+                    code = bc.data.decode("utf-8")
+                    if code in seen: continue
+                    seen.add(code)
+
+                    is_valid, reason = validate_barcode_balanced(code)
+                    if not is_valid:
+                        rejected_log.append({"barcode_data": code, "reason": reason})
+                        continue
+
+                    conf = calculate_barcode_confidence_balanced(bc)
+                    if conf < self.confidence_threshold:
+                        rejected_log.append({"barcode_data": code, "reason": f"낮은_신뢰도_{conf:.1f}%"})
+                        continue
+
+                    candidate_info = (bc, code, conf, reason)
+                    if code in BARCODE_PRODUCT_MAP:
+                        registered.append(candidate_info)
+                    else:
+                        unregistered.append(candidate_info)
+                except Exception as e:
+                    print(f"[{now_str}] [BALANCE] ❌ 후보 처리 오류: {e}")
+
+            final_candidates = registered or unregistered
+            if registered and unregistered:
+                print(f"[{now_str}] [BALANCE] 🚫 미등록 {len(unregistered)}개 무시 (등록 제품 우선)")
+
+            # 쿨다운 확인과 갱신을 한 번에 (같은 카메라의 동시 호출이 같은 바코드를 중복 기록하지 않도록)
+            with self.lock:
+                self.rejected_count += len(rejected_log)
+                last = self.last_detected
+                valid_after_cooldown = [
+                    cand for cand in final_candidates
+                    if not (last and last["data"] == cand[1] and current_time - last["time"] < self.cooldown)
+                ]
+
+                if len(valid_after_cooldown) > 1:
+                    valid_after_cooldown.sort(key=lambda x: x[2], reverse=True)
+                    print(f"[{now_str}] [BALANCE] 🎯 최고 신뢰도 선택: {valid_after_cooldown[0][1]}")
+                    valid_after_cooldown = [valid_after_cooldown[0]]
+
+                if not valid_after_cooldown: return []
+
+                for _bc, code, _conf, _reason in valid_after_cooldown:
+                    self.last_detected = {"data": code, "time": current_time}
+                self.last_detection_time = current_time
+                self.detection_count += len(valid_after_cooldown)
+
+            detections = []
+            for bc, code, conf, reason in valid_after_cooldown:
+                product_name = BARCODE_PRODUCT_MAP.get(code, f"미등록제품({code})")
+
+                # bbox를 항상 계산 (rect fallback 포함)
+                bbox = _compute_bbox(bc)
+
+                # 이미지 저장 + DB 기록은 writer 스레드에서 (파일 이름만 바로 받음)
+                image_filename = get_image_writer().submit(frame_data, code, product_name, conf, bbox)
+
+                detection_result = {
+                    "barcode_data": code, "barcode_type": bc.type, "product_name": product_name,
+                    "is_registered": code in BARCODE_PRODUCT_MAP, "bbox": bbox, "confidence": conf,
+                    "points": [(p.x, p.y) for p in getattr(bc, "polygon", [])] or None,
+                    "timestamp": current_time, "detection_source": "server_balanced",
+                    "validation_reason": reason, "image_filename": image_filename,
+                    "cam_id": self.cam_id
+                }
+                detections.append(detection_result)
+                print(f"[{now_str}] [BALANCE] 🎉 검출 성공: {code} → {product_name} ({conf:.1f}%)")
 
-    try:
-        nparr = np.frombuffer(frame_data, np.uint8)
-        frame = cv2.imdecode(nparr, cv2.IMREAD_COLOR)
-        if frame is None: return []
-
-        gray = cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY)
-        barcodes = pyzbar.decode(gray)
-        if not barcodes:
-            enhanced = cv2.convertScaleAbs(gray, alpha=1.1, beta=10)
-            barcodes = pyzbar.decode(enhanced)
-        if not barcodes: return []
-        
-        now_str = datetime.datetime.now().strftime("%H:%M:%S")
-        print(f"[{now_str}] [BALANCE] 검출된 바코드: {len(barcodes)}개")
-
-        registered, unregistered = [], []
-        seen, rejected_log = set(), []
-
-        for bc in barcodes:
-            try:
-                code = bc.data.decode("utf-8")
-                if code in seen: continue
-                seen.add(code)
-
-                is_valid, reason = validate_barcode_balanced(code)
-                if not is_valid:
-                    rejected_log.append({"barcode_data": code, "reason": reason})
-                    continue
-
-                conf = calculate_barcode_confidence_balanced(bc)
-                if conf < CONFIDENCE_THRESHOLD:
-                    rejected_log.append({"barcode_data": code, "reason": f"낮은_신뢰도_{conf:.1f}%"})
-                    continue
-                
-                candidate_info = (bc, code, conf, reason)
-                if code in BARCODE_PRODUCT_MAP:
-                    registered.append(candidate_info)
-                else:
-                    unregistered.append(candidate_info)
-            except Exception as e:
-                print(f"[{now_str}] [BALANCE] ❌ 후보 처리 오류: {e}")
-        
-        rejected_barcode_count += len(rejected_log)
-
-        final_candidates = registered or unregistered
-        if registered and unregistered:
-            print(f"[{now_str}] [BALANCE] 🚫 미등록 {len(unregistered)}개 무시 (등록 제품 우선)")
-
-        valid_after_cooldown = [
-            cand for cand in final_candidates
-            if not (last_detected_barcode and last_detected_barcode["data"] == cand[1] and \
-                    current_time - last_detected_barcode["time"] < BARCODE_COOLDOWN)
-        ]
-
-        if len(valid_after_cooldown) > 1:
-            valid_after_cooldown.sort(key=lambda x: x[2], reverse=True)
-            print(f"[{now_str}] [BALANCE] 🎯 최고 신뢰도 선택: {valid_after_cooldown[0][1]}")
-            valid_after_cooldown = [valid_after_cooldown[0]]
-
-        if not valid_after_cooldown: return []
-
-        detections = []
-        for bc, code, conf, reason in valid_after_cooldown:
-            product_name = BARCODE_PRODUCT_MAP.get(code, f"미등록제품({code})")
-            
-            # --- ✨ 핵심 수정 ✨ ---
-            # 1. bbox를 항상 계산 (rect fallback 포함)
-            bbox = _compute_bbox(bc)
-            
-            # 2. 이미지 저장을 항상 시도
-            image_filename = save_barcode_image(frame_data, code, bbox, product_name)
-            
-            # 3. DB 저장을 항상 시도 (이미지 저장 실패와 무관)
-            try:
-                from db.manager import save_barcode_detection
-                save_barcode_detection(code, product_name, conf, image_filename, bbox)
-            except Exception as e:
-                print(f"[{now_str}] [ERROR] DB 저장 오류: {e}")
-            # --- ✨ ---
-            
-            detection_result = {
-                "barcode_data": code, "barcode_type": bc.type, "product_name": product_name,
-                "is_registered": code in BARCODE_PRODUCT_MAP, "bbox": bbox, "confidence": conf,
-                "points": [(p.x, p.y) for p in getattr(bc, "polygon", [])] or None,
-                "timestamp": current_time, "detection_source": "server_balanced",
-                "validation_reason": reason, "image_filename": image_filename
-            }
-            detections.append(detection_result)
-            last_detected_barcode = {"data": code, "time": current_time}
-            print(f"[{now_str}] [BALANCE] 🎉 검출 성공: {code} → {product_name} ({conf:.1f}%)")
-
-        if detections:
-            last_barcode_detection_time = current_time
-            barcode_detection_count += len(detections)
-            
             with barcode_detection_lock:
                 product_counts = Counter([d["product_name"] for d in detections])
                 barcode_detection_history.append({
                     "timestamp": current_time, "total_count": len(detections),
                     "product_distribution": dict(product_counts), "detections": detections,
                     "rejected_barcodes": rejected_log[:3], "rejected_count": len(rejected_log),
-                    "detection_source": "server_balanced"
+                    "detection_source": "server_balanced", "cam_id": self.cam_id
                 })
 
             if BARCODE_BROADCAST_ENABLED and broadcast_fn:
@@ -239,12 +234,52 @@ def detect_balanced_barcodes(frame_data, broadcast_fn=None):
                 except Exception as e:
                     print(f"[BALANCE] broadcast 실패: {e}")
 
-        return detections
+            return detections
+
+        except Exception as e:
+            print(f"[{datetime.datetime.now():%H:%M:%S}] [ERROR] Balance 바코드 검출 오류: {e}")
+            import traceback; traceback.print_exc()
+            return []
+
+    def stats(self):
+        with self.lock:
+            return {
+                "cam_id": self.cam_id,
+                "detections": self.detection_count,
+                "rejected": self.rejected_count,
+                "last_detected": dict(self.last_detected) if self.last_detected else None,
+                "interval": self.interval,
+                "cooldown": self.cooldown,
+                "roi": self.roi,
+                "decode_scale": self.decode_scale,
+                "decoder_stages": list(self.decoder_stages),
+            }
+
+
+def get_detector(cam_id, **options):
+    """카메라별 검출기 (없으면 options 로 생성)"""
+    cam_id = str(cam_id)
+    with _detectors_lock:
+        detector = detectors.get(cam_id)
+        if detector is None:
+            detector = detectors[cam_id] = BarcodeDetector(cam_id, **options)
+        return detector
+
+
+def get_detector_stats():
+    return {cam_id: detector.stats() for cam_id, detector in list(detectors.items())}
+
+
+def get_detection_totals():
+    """전체 카메라 누적 (검출 수, 차단 수)"""
+    stats = get_detector_stats().values()
+    return sum(s["detections"] for s in stats), sum(s["rejected"] for s in stats)
+
+
+def get_cascade_stats():
+    """카메라별 디코더 캐스케이드 단계 실행 수 / 성공률 / 지연 히스토그램"""
+    return {cam_id: detector.cascade_stats.snapshot() for cam_id, detector in list(detectors.items())}
 
-    except Exception as e:
-        print(f"[{datetime.datetime.now():%H:%M:%S}] [ERROR] Balance 바코드 검출 오류: {e}")
-        import traceback; traceback.print_exc()
-        return []
 
 # get_barcode_stats, get_barcode_history, add_external_barcode_data 함수는 변경 없음
 # ... (기존 코드와 동일) ...
@@ -0,0 +1,83 @@
+"""
+최근 검출 이미지 메모리 캐시 (바이트 크기 기준 LRU)
+- 저장 파이프라인(writer)이 파일을 쓰면서 바로 넣어 둠 → 첫 요청부터 디스크를 읽지 않음
+- 키: ("image" | "thumb", 파일 이름)
+- 이미지 저장소에서 삭제된 파일은 함께 제거
+"""
+import threading
+from collections import OrderedDict
+from config import IMAGE_CACHE_MAX_BYTES, IMAGE_CACHE_MAX_ITEM_BYTES
+
+
+class ImageCache:
+    """바이트 크기 제한 LRU"""
+
+    def __init__(self, max_bytes=IMAGE_CACHE_MAX_BYTES, max_item_bytes=IMAGE_CACHE_MAX_ITEM_BYTES):
+        self.max_bytes = max_bytes
+        self.max_item_bytes = max_item_bytes
+        self.lock = threading.Lock()
+        self._items = OrderedDict()
+        self._bytes = 0
+
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.rejected = 0
+
+    def get(self, kind, filename):
+        key = (kind, filename)
+        with self.lock:
+            data = self._items.get(key)
+            if data is None:
+                self.misses += 1
+                return None
+            self._items.move_to_end(key)
+            self.hits += 1
+            return data
+
+    def put(self, kind, filename, data):
+        size = len(data)
+        if not self.max_bytes or size > self.max_item_bytes:
+            with self.lock:
+                self.rejected += 1
+            return False
+
+        key = (kind, filename)
+        with self.lock:
+            old = self._items.pop(key, None)
+            if old is not None:
+                self._bytes -= len(old)
+            self._items[key] = data
+            self._bytes += size
+            while self._bytes > self.max_bytes and self._items:
+                _, evicted = self._items.popitem(last=False)
+                self._bytes -= len(evicted)
+                self.evictions += 1
+        return True
+
+    def discard(self, filenames):
+        """파일 이름들의 원본/썸네일 캐시 제거"""
+        with self.lock:
+            for filename in filenames:
+                for kind in ("image", "thumb"):
+                    data = self._items.pop((kind, filename), None)
+                    if data is not None:
+                        self._bytes -= len(data)
+
+    def stats(self):
+        with self.lock:
+            lookups = self.hits + self.misses
+            return {
+                "entries": len(self._items),
+                "resident_bytes": self._bytes,
+                "max_bytes": self.max_bytes,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_ratio": round(self.hits / lookups, 3) if lookups else 0,
+                "evictions": self.evictions,
+                "rejected": self.rejected,
+            }
+
+
+# 전역 캐시 (스레드 없음, import 시 생성)
+image_cache = ImageCache()
@@ -0,0 +1,299 @@
+"""
+바코드 검출 이미지 저장소
+- 파일은 root/YYYYMMDD/HH/{ts}_{barcode}.jpg 로 날짜/시간 샤딩 (파일 이름의 타임스탬프 기준)
+- 파일 이름 → 크기 인덱스를 메모리에 유지 (조회/목록에 디렉토리 stat 불필요)
+- 용량 한도(quota) / 보관 기간(retention) 초과분은 백그라운드에서 오래된 것부터 삭제
+  → 삭제된 파일을 가리키는 barcode_detection_log 행의 image_path / image_filename 은 NULL 로 정리
+- 예전 평면 구조(root/{파일})에 있던 이미지는 시작 시 샤드 폴더로 이동 (검출 로그 image_path 도 갱신)
+- 썸네일은 root/_thumbs/YYYYMMDD/HH/ 에 같은 파일 이름으로 저장 (원본과 함께 삭제)
+"""
+import datetime
+import os
+import re
+import threading
+import time
+from collections import OrderedDict
+from config import (
+    BARCODE_IMAGE_DIR,
+    BARCODE_IMAGE_QUOTA_BYTES,
+    BARCODE_IMAGE_RETENTION_DAYS,
+    BARCODE_IMAGE_EVICT_INTERVAL,
+)
+
+THUMB_DIR_NAME = "_thumbs"
+
+# {YYYYMMDD}_{HHMMSS}_{마이크로초}_{바코드}.jpg
+_FILENAME_RE = re.compile(r"^(\d{8})_(\d{2})\d{4}_\d{6}_[^/\\]+\.jpg$")
+
+
+def parse_shard(filename):
+    """파일 이름 → (날짜, 시) 샤드. 형식이 다르면 None"""
+    m = _FILENAME_RE.match(filename)
+    return (m.group(1), m.group(2)) if m else None
+
+
+class ImageStore:
+    """날짜/시간 샤딩 + 용량/기간 제한 이미지 저장소"""
+
+    def __init__(self, root=BARCODE_IMAGE_DIR, quota_bytes=BARCODE_IMAGE_QUOTA_BYTES,
+                 retention_days=BARCODE_IMAGE_RETENTION_DAYS, evict_interval=BARCODE_IMAGE_EVICT_INTERVAL):
+        self.root = os.path.abspath(root)
+        self.thumb_root = os.path.join(self.root, THUMB_DIR_NAME)
+        self.quota_bytes = quota_bytes
+        self.retention_days = retention_days
+        self.evict_interval = evict_interval
+
+        self.lock = threading.Lock()
+        self._index = OrderedDict()  # 파일 이름 → 크기 (오래된 것부터)
+        self._total_bytes = 0
+        self._known_dirs = set()
+        self._evict_now = threading.Event()
+
+        self.evicted_files = 0
+        self.evicted_bytes = 0
+        self.last_eviction = None
+        self.db_cleanup_errors = 0
+
+        os.makedirs(self.root, exist_ok=True)
+        self._load_index()
+        self._thread = threading.Thread(target=self._evict_loop, name="barcode-image-evictor", daemon=True)
+
+    def start(self):
+        self._thread.start()
+        return self
+
+    # ===== 경로 =====
+    def shard_dir(self, filename, root=None):
+        shard = parse_shard(filename)
+        if shard is None:
+            return None
+        return os.path.join(root or self.root, shard[0], shard[1])
+
+    def thumb_path(self, filename):
+        directory = self.shard_dir(filename, self.thumb_root)
+        return os.path.join(directory, filename) if directory else None
+
+    def path_for(self, filename):
+        """파일 이름 → 저장 경로 (형식이 잘못된 이름이면 None)"""
+        directory = self.shard_dir(filename)
+        return os.path.join(directory, filename) if directory else None
+
+    def resolve(self, filename):
+        """저장된 파일이면 (샤드 폴더, 파일 이름), 없으면 None (인덱스만 조회)"""
+        filename = os.path.basename(filename)
+        with self.lock:
+            if filename not in self._index:
+                return None
+        return self.shard_dir(filename), filename
+
+    # ===== 쓰기 =====
+    def _write_file(self, directory, filename, data):
+        if directory is None:
+            raise ValueError(f"잘못된 이미지 파일 이름: {filename}")
+        if directory not in self._known_dirs:
+            os.makedirs(directory, exist_ok=True)
+            self._known_dirs.add(directory)
+
+        path = os.path.join(directory, filename)
+        tmp_path = path + ".tmp"
+        try:
+            f = open(tmp_path, mode='wb')
+        except FileNotFoundError:
+            # 정리 스레드가 빈 샤드 폴더를 지운 직후
+            os.makedirs(directory, exist_ok=True)
+            f = open(tmp_path, mode='wb')
+        with f:
+            f.write(data)
+        os.replace(tmp_path, path)
+        return path
+
+    def write(self, filename, data):
+        """이미지 저장 (임시 파일에 쓴 뒤 rename) → 저장 경로"""
+        path = self._write_file(self.shard_dir(filename), filename, data)
+
+        with self.lock:
+            old_size = self._index.pop(filename, 0)
+            self._index[filename] = len(data)
+            self._total_bytes += len(data) - old_size
+            over_quota = self.quota_bytes and self._total_bytes > self.quota_bytes
+        if over_quota:
+            self._evict_now.set()
+        return path
+
+    def write_thumb(self, filename, data):
+        """썸네일 저장 → 저장 경로 (인덱스/용량 집계에는 포함하지 않음)"""
+        return self._write_file(self.shard_dir(filename, self.thumb_root), filename, data)
+
+    def list_files(self, day=None, limit=100):
+        """최근 파일 이름 목록 (day='YYYYMMDD' 로 날짜 지정 가능)"""
+        with self.lock:
+            names = reversed(self._index.keys())
+            if day:
+                names = (n for n in names if n.startswith(day))
+            result = []
+            for name in names:
+                result.append(name)
+                if len(result) >= limit:
+                    break
+            return result
+
+    # ===== 인덱스 =====
+    def _load_index(self):
+        """시작 시 샤드 폴더 스캔 (+ 평면 구조 파일은 샤드로 이동)"""
+        started = time.time()
+        entries = []
+        moves = []  # (파일 이름, 새 경로)
+
+        with os.scandir(self.root) as it:
+            for entry in it:
+                if entry.is_file():
+                    directory = self.shard_dir(entry.name)
+                    if directory is None:
+                        continue
+                    size = entry.stat().st_size
+                    os.makedirs(directory, exist_ok=True)
+                    path = os.path.join(directory, entry.name)
+                    os.replace(entry.path, path)
+                    entries.append((entry.name, size))
+                    moves.append((entry.name, path))
+                elif entry.is_dir() and entry.name.isdigit():
+                    for hour in os.scandir(entry.path):
+                        if not hour.is_dir():
+                            continue
+                        self._known_dirs.add(hour.path)
+                        for f in os.scandir(hour.path):
+                            if f.is_file() and parse_shard(f.name):
+                                entries.append((f.name, f.stat().st_size))
+
+        entries.sort()
+        with self.lock:
+            self._index = OrderedDict(entries)
+            self._total_bytes = sum(size for _, size in entries)
+
+        # 검출 로그가 이동 전 경로를 가리키지 않도록
+        if moves:
+            try:
+                from db.manager import update_barcode_image_paths
+                update_barcode_image_paths(moves)
+            except Exception as e:
+                self.db_cleanup_errors += 1
+                print(f"[IMAGE] ❌ 이동한 이미지 경로 갱신 실패: {e}")
+
+        print(f"[INIT] 바코드 이미지 인덱스: {len(entries)}개, {self._total_bytes / 1e6:.1f}MB "
+              f"(이동 {len(moves)}개, {time.time() - started:.2f}초)")
+
+    # ===== 정리 =====
+    def _evict_loop(self):
+        while True:
+            self._evict_now.wait(self.evict_interval)
+            self._evict_now.clear()
+            try:
+                self.evict()
+            except Exception as e:
+                print(f"[{datetime.datetime.now():%H:%M:%S}] [IMAGE] ❌ 이미지 정리 오류: {e}")
+
+    def _pick_victims(self):
+        """보관 기간이 지났거나 용량 한도를 넘는 만큼 오래된 파일 선택"""
+        cutoff = None
+        if self.retention_days:
+            cutoff = (datetime.datetime.now() - datetime.timedelta(days=self.retention_days)).strftime("%Y%m%d_%H%M%S")
+
+        victims = []
+        with self.lock:
+            remaining = self._total_bytes
+            for name, size in self._index.items():
+                expired = cutoff is not None and name[:15] < cutoff
+                over_quota = self.quota_bytes and remaining > self.quota_bytes
+                if not (expired or over_quota):
+                    break
+                victims.append(name)
+                remaining -= size
+        return victims
+
+    def evict(self):
+        """정리 1회 실행 → 삭제한 파일 수"""
+        victims = self._pick_victims()
+        if not victims:
+            return 0
+
+        removed, freed = [], 0
+        touched_dirs = set()
+        for name in victims:
+            directory = self.shard_dir(name)
+            thumb_directory = self.shard_dir(name, self.thumb_root)
+            try:
+                os.remove(os.path.join(directory, name))
+            except FileNotFoundError:
+                pass
+            except OSError as e:
+                print(f"[IMAGE] ❌ 삭제 실패 {name}: {e}")
+                continue
+            try:
+                os.remove(os.path.join(thumb_directory, name))
+                touched_dirs.add(thumb_directory)
+            except OSError:
+                pass
+            with self.lock:
+                size = self._index.pop(name, 0)
+                self._total_bytes -= size
+            freed += size
+            removed.append(name)
+            touched_dirs.add(directory)
+
+        # 빈 샤드 폴더 정리 (시 → 날짜)
+        for directory in touched_dirs:
+            for path in (directory, os.path.dirname(directory)):
+                try:
+                    os.rmdir(path)
+                    self._known_dirs.discard(path)
+                except OSError:
+                    break
+
+        # 캐시에 남은 사본 제거
+        from barcode.image_cache import image_cache
+        image_cache.discard(removed)
+
+        # DB 행이 삭제된 파일을 가리키지 않도록
+        try:
+            from db.manager import clear_barcode_image_refs
+            clear_barcode_image_refs(removed)
+        except Exception as e:
+            self.db_cleanup_errors += 1
+            print(f"[IMAGE] ❌ 이미지 참조 정리 실패: {e}")
+
+        with self.lock:
+            self.evicted_files += len(removed)
+            self.evicted_bytes += freed
+            self.last_eviction = datetime.datetime.now().isoformat()
+        print(f"[{datetime.datetime.now():%H:%M:%S}] [IMAGE] 🧹 이미지 {len(removed)}개 정리 ({freed / 1e6:.1f}MB)")
+        return len(removed)
+
+    def stats(self):
+        with self.lock:
+            return {
+                "root": self.root,
+                "files": len(self._index),
+                "bytes": self._total_bytes,
+                "quota_bytes": self.quota_bytes,
+                "usage_ratio": round(self._total_bytes / self.quota_bytes, 3) if self.quota_bytes else None,
+                "retention_days": self.retention_days,
+                "oldest": next(iter(self._index), None),
+                "evicted_files": self.evicted_files,
+                "evicted_bytes": self.evicted_bytes,
+                "last_eviction": self.last_eviction,
+                "db_cleanup_errors": self.db_cleanup_errors,
+            }
+
+
+# 전역 저장소 (첫 사용 시 인덱스 로드 + 정리 스레드 시작)
+_image_store = None
+_image_store_lock = threading.Lock()
+
+
+def get_image_store():
+    global _image_store
+    if _image_store is None:
+        with _image_store_lock:
+            if _image_store is None:
+                _image_store = ImageStore().start()
+    return _image_store
@@ -0,0 +1,250 @@
+"""
+바코드 검출 이미지/DB 기록 백그라운드 writer
+- 검출 스레드는 작업을 큐에 넣고 바로 반환 (JPEG 디코딩/박스 그리기/인코딩/파일 쓰기/DB INSERT 모두 writer 스레드)
+- 이미지 큐는 크기 제한: 가득 차면 이미지만 버리고 DB 기록은 유지
+- DB 기록은 이미지 처리 후 db.manager write-behind 큐로 (batch 저장은 db.manager 담당)
+- 갤러리용 썸네일은 원본 저장 시 함께 생성 (예전 이미지는 첫 요청 시 생성)
+"""
+import atexit
+import datetime
+import os
+import queue
+import threading
+import time
+import cv2
+import numpy as np
+from barcode.image_store import get_image_store
+from barcode.image_cache import image_cache
+from config import (
+    SAVE_BARCODE_IMAGES,
+    IMAGE_WRITER_QUEUE_SIZE,
+    BARCODE_IMAGE_JPEG_QUALITY,
+    BARCODE_THUMB_WIDTH,
+    BARCODE_THUMB_JPEG_QUALITY,
+)
+
+
+def make_image_filename(barcode_data, detected_at=None):
+    """저장 파일 이름 ({ts}_{barcode}.jpg) - 검출 시점에 바로 정해서 결과/DB 에 함께 기록"""
+    ts = (detected_at or datetime.datetime.now()).strftime("%Y%m%d_%H%M%S_%f")
+    return f"{ts}_{barcode_data}.jpg"
+
+
+def encode_jpeg(frame, quality):
+    # cv2.imwrite 는 한글 경로에서 실패하므로 imencode 후 python open 으로 저장
+    result, encoded_img = cv2.imencode('.jpg', frame, [cv2.IMWRITE_JPEG_QUALITY, quality])
+    return encoded_img.tobytes() if result else None
+
+
+def render_barcode_image(frame_data, barcode_data, bbox, product_name, frame=None):
+    """
+    검출 박스/라벨을 그린 이미지 → (JPEG bytes, 그린 BGR 프레임). 실패 시 (None, None)
+    frame: 이미 디코딩된 BGR 프레임이 있으면 전달 (JPEG 재디코딩 생략)
+    그릴 것이 없으면 원본 JPEG 를 그대로 반환 (프레임은 None)
+    """
+    if frame is None:
+        if not (bbox and len(bbox) == 4):
+            return bytes(frame_data), None
+        nparr = np.frombuffer(frame_data, np.uint8)
+        frame = cv2.imdecode(nparr, cv2.IMREAD_COLOR)
+        if frame is None:
+            return None, None
+
+    if bbox and len(bbox) == 4:
+        x1, y1, x2, y2 = map(int, bbox)
+        cv2.rectangle(frame, (x1, y1), (x2, y2), (0, 255, 0), 3)
+        cv2.putText(frame, str(barcode_data), (x1, max(0, y1 - 30)),
+                    cv2.FONT_HERSHEY_SIMPLEX, 0.8, (0, 255, 0), 2)
+        cv2.putText(frame, str(product_name), (x1, max(0, y1 - 10)),
+                    cv2.FONT_HERSHEY_SIMPLEX, 0.6, (0, 255, 0), 2)
+
+    return encode_jpeg(frame, BARCODE_IMAGE_JPEG_QUALITY), frame
+
+
+def make_thumbnail(frame=None, jpeg_data=None, width=BARCODE_THUMB_WIDTH):
+    """썸네일 JPEG bytes (프레임이 없으면 JPEG 을 1/2 축소 디코딩해서 사용)"""
+    if frame is None:
+        frame = cv2.imdecode(np.frombuffer(jpeg_data, np.uint8), cv2.IMREAD_REDUCED_COLOR_2)
+        if frame is None:
+            return None
+    h, w = frame.shape[:2]
+    if w > width:
+        frame = cv2.resize(frame, (width, max(1, h * width // w)), interpolation=cv2.INTER_AREA)
+    return encode_jpeg(frame, BARCODE_THUMB_JPEG_QUALITY)
+
+
+def ensure_thumbnail(filename, store=None):
+    """
+    썸네일 경로 반환 (없으면 원본에서 생성, 원본도 없으면 None)
+    저장 시 썸네일을 만들기 전의 예전 이미지용
+    """
+    store = store or get_image_store()
+    found = store.resolve(filename)
+    if found is None:
+        return None
+    thumb_path = store.thumb_path(found[1])
+    if os.path.exists(thumb_path):
+        return thumb_path
+
+    with open(os.path.join(*found), mode='rb') as f:
+        data = make_thumbnail(jpeg_data=f.read())
+    if data is None:
+        return None
+    path = store.write_thumb(found[1], data)
+    image_cache.put("thumb", found[1], data)
+    return path
+
+
+class BarcodeImageWriter:
+    """검출 이미지 저장 전용 스레드 (저장 후 검출 로그를 DB 큐에 넘김)"""
+
+    def __init__(self, store=None, queue_size=IMAGE_WRITER_QUEUE_SIZE):
+        self.store = store or get_image_store()
+        self._images = queue.Queue(maxsize=queue_size)
+
+        self.lock = threading.Lock()
+        self.enqueued = 0
+        self.images_written = 0
+        self.images_dropped = 0
+        self.image_errors = 0
+        self.rows_rejected = 0
+        self.last_write_ms = 0.0
+        self.max_write_ms = 0.0
+        self.total_write_sec = 0.0
+        self.total_wait_sec = 0.0
+
+        self._thread = threading.Thread(target=self._run, name="barcode-image-writer", daemon=True)
+
+    def start(self):
+        self._thread.start()
+        atexit.register(self.flush)
+        return self
+
+    def submit(self, frame_data, barcode_data, product_name, confidence, bbox, frame=None):
+        """
+        검출 1건 기록 요청 (검출 스레드에서 호출, 블로킹 없음)
+        반환: 저장될 이미지 파일 이름 (이미지 저장 안 함/큐 가득 참이면 None)
+        """
+        detected_at = datetime.datetime.now()
+        row = {
+            "barcode": barcode_data,
+            "product": product_name,
+            "conf": confidence,
+            "filename": None,
+            "path": None,
+            "bbox": bbox,
+            "detected_at": detected_at,
+        }
+
+        with self.lock:
+            self.enqueued += 1
+
+        if SAVE_BARCODE_IMAGES and frame_data is not None:
+            row["filename"] = make_image_filename(barcode_data, detected_at)
+            try:
+                self._images.put_nowait((frame_data, frame, row, time.time()))
+                return row["filename"]
+            except queue.Full:
+                row["filename"] = None
+                with self.lock:
+                    self.images_dropped += 1
+
+        self._record(row)
+        return None
+
+    def _record(self, row):
+        """검출 로그 DB 저장 요청 (write-behind 큐가 가득 차서 버려지면 집계)"""
+        from db.manager import save_barcode_detections
+        if not save_barcode_detections([row]):
+            with self.lock:
+                self.rows_rejected += 1
+
+    def _write_image(self, frame_data, frame, row):
+        data, annotated = render_barcode_image(frame_data, row["barcode"], row["bbox"], row["product"], frame)
+        if data is None:
+            raise ValueError("프레임 디코딩/인코딩 실패")
+        row["path"] = self.store.write(row["filename"], data)
+        # 최근 검출 이미지는 갤러리가 바로 요청하므로 메모리에도 보관
+        image_cache.put("image", row["filename"], data)
+
+        # 썸네일 (실패해도 원본 저장은 유지, 갤러리 요청 시 다시 생성)
+        try:
+            thumb = make_thumbnail(annotated, data)
+            if thumb is not None:
+                self.store.write_thumb(row["filename"], thumb)
+                image_cache.put("thumb", row["filename"], thumb)
+        except Exception as e:
+            print(f"[{datetime.datetime.now():%H:%M:%S}] [IMAGE] 썸네일 생성 실패: {e}")
+
+    def _run(self):
+        while True:
+            frame_data, frame, row, submitted_at = self._images.get()
+            started = time.time()
+            try:
+                self._write_image(frame_data, frame, row)
+                ok = True
+            except Exception as e:
+                ok = False
+                row["filename"] = None
+                print(f"[{datetime.datetime.now():%H:%M:%S}] [IMAGE] ❌ 이미지 저장 실패: {e}")
+            elapsed = time.time() - started
+
+            with self.lock:
+                if ok:
+                    self.images_written += 1
+                else:
+                    self.image_errors += 1
+                self.last_write_ms = elapsed * 1000
+                self.max_write_ms = max(self.max_write_ms, self.last_write_ms)
+                self.total_write_sec += elapsed
+                self.total_wait_sec += started - submitted_at
+            self._record(row)
+
+    def flush(self):
+        """종료 시: 남은 이미지 작업을 현재 스레드에서 처리하고 DB 큐에 넘김"""
+        while True:
+            try:
+                frame_data, frame, row, _ = self._images.get_nowait()
+            except queue.Empty:
+                break
+            try:
+                self._write_image(frame_data, frame, row)
+            except Exception:
+                row["filename"] = None
+            self._record(row)
+
+    def stats(self):
+        with self.lock:
+            written = self.images_written or 1
+            return {
+                "queue_depth": self._images.qsize(),
+                "queue_size": self._images.maxsize,
+                "enqueued": self.enqueued,
+                "images_written": self.images_written,
+                "images_dropped": self.images_dropped,
+                "image_errors": self.image_errors,
+                "rows_rejected": self.rows_rejected,
+                "last_write_ms": round(self.last_write_ms, 2),
+                "avg_write_ms": round(self.total_write_sec / written * 1000, 2),
+                "max_write_ms": round(self.max_write_ms, 2),
+                "avg_queue_wait_ms": round(self.total_wait_sec / written * 1000, 2),
+            }
+
+
+# 전역 writer (첫 사용 시 시작)
+_image_writer = None
+_image_writer_lock = threading.Lock()
+
+
+def get_image_writer():
+    global _image_writer
+    if _image_writer is None:
+        with _image_writer_lock:
+            if _image_writer is None:
+                _image_writer = BarcodeImageWriter().start()
+                print(f"[INIT] 바코드 이미지 writer 시작 (큐 {_image_writer._images.maxsize})")
+    return _image_writer
+
+
+def get_image_writer_stats():
+    return _image_writer.stats() if _image_writer else None
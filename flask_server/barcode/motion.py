@@ -0,0 +1,94 @@
+"""
+모션 게이트 (장면 변화가 없는 프레임은 바코드 디코딩 생략)
+- 컨베이어가 멈춰 있거나 빈 장면이면 pyzbar 를 돌릴 필요가 없음
+- 비교 기준은 마지막으로 디코딩한 프레임 (느린 변화도 누적되면 통과)
+"""
+import time
+import threading
+import cv2
+import numpy as np
+from config import (
+    MOTION_SIZE_EPSILON,
+    MOTION_PIXEL_DELTA,
+    MOTION_CHANGED_RATIO,
+    MOTION_GATE_REFRESH,
+)
+
+
+class MotionGate:
+    """카메라 1대의 장면 변화 게이트"""
+
+    def __init__(self, roi=None):
+        self.roi = roi
+        self._ref_small = None  # 마지막 디코딩 프레임 (1/8 그레이스케일, ROI)
+        self._ref_size = 0
+        self._last_pass = 0
+
+        self.lock = threading.Lock()
+        self.passed = 0
+        self.gated = 0
+        self.gated_by_size = 0
+        self.gate_time = 0.0
+
+    def _small_gray(self, frame_data):
+        nparr = np.frombuffer(frame_data, np.uint8)
+        small = cv2.imdecode(nparr, cv2.IMREAD_REDUCED_GRAYSCALE_8)
+        if small is None or not self.roi:
+            return small
+        h, w = small.shape[:2]
+        x1, y1, x2, y2 = self.roi
+        roi_small = small[int(h * y1):int(h * y2), int(w * x1):int(w * x2)]
+        return roi_small if roi_small.size else small
+
+    def should_decode(self, frame_data):
+        """
+        이 프레임을 디코딩해야 하는지 (장면 변화 / 새 물체 / 주기적 강제 통과)
+        - 통과하면 이 프레임이 비교 기준이 되므로, 통과 시 실제로 디코딩할 프레임에만 호출
+        """
+        started = time.perf_counter()
+        now = time.time()
+        size = len(frame_data)
+        decision, by_size = True, False
+
+        if self._ref_small is not None and now - self._last_pass < MOTION_GATE_REFRESH:
+            # 1. JPEG 크기가 거의 같으면 디코딩 없이 동일 장면으로 판단
+            if self._ref_size and abs(size - self._ref_size) / self._ref_size < MOTION_SIZE_EPSILON:
+                decision, by_size = False, True
+            else:
+                # 2. 축소 프레임 차이: 변한 픽셀 비율
+                small = self._small_gray(frame_data)
+                if small is not None and small.shape == self._ref_small.shape:
+                    diff = cv2.absdiff(small, self._ref_small)
+                    changed = np.count_nonzero(diff > MOTION_PIXEL_DELTA) / diff.size
+                    decision = changed >= MOTION_CHANGED_RATIO
+                    if decision:
+                        self._ref_small = small
+                else:
+                    self._ref_small = small
+        else:
+            self._ref_small = self._small_gray(frame_data)
+
+        if decision:
+            self._ref_size = size
+            self._last_pass = now
+
+        with self.lock:
+            self.gate_time += time.perf_counter() - started
+            if decision:
+                self.passed += 1
+            else:
+                self.gated += 1
+                if by_size:
+                    self.gated_by_size += 1
+        return decision
+
+    def stats(self):
+        with self.lock:
+            total = self.passed + self.gated
+            return {
+                "passed": self.passed,
+                "gated": self.gated,
+                "gated_by_size": self.gated_by_size,
+                "gated_ratio": round(self.gated / total, 3) if total else 0,
+                "avg_gate_ms": round(self.gate_time / total * 1000, 3) if total else 0,
+            }
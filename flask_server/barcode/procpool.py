@@ -0,0 +1,141 @@
+"""
+프로세스 풀 바코드 디코딩 (공유 메모리 프레임 전달)
+- pyzbar/OpenCV 디코딩을 별도 프로세스에서 실행해 Flask 프로세스의 GIL 경합 제거
+- 프레임은 pickle 대신 공유 메모리 슬롯에 복사해서 전달, 워커는 슬롯 이름/길이만 받음
+- 결과(pyzbar 디코딩 결과)만 메인 프로세스로 돌아오고, 쿨다운/DB/브로드캐스트는 메인에서 처리
+- 워커 프로세스가 죽으면(OOM 등) 풀을 새로 만들고, 그 프레임은 호출 스레드에서 직접 디코딩
+"""
+import atexit
+import queue
+import threading
+import time
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from multiprocessing import shared_memory
+from barcode.decoding import decode_barcodes
+
+# 워커 프로세스: 슬롯 이름 → 연결된 SharedMemory (매 작업마다 다시 열지 않도록 캐시)
+_attached_segments = {}
+
+
+def _attach(name):
+    shm = _attached_segments.get(name)
+    if shm is None:
+        shm = shared_memory.SharedMemory(name=name)
+        _attached_segments[name] = shm
+    return shm
+
+
+def _decode_shared(name, length, roi, scale, stages):
+    """워커 프로세스: 공유 메모리 슬롯의 JPEG 디코딩"""
+    view = _attach(name).buf[:length]
+    try:
+        return decode_barcodes(view, roi, scale, stages)
+    finally:
+        view.release()
+
+
+class SharedFrameDecodePool:
+    """공유 메모리 슬롯 + ProcessPoolExecutor 기반 디코딩 풀"""
+
+    def __init__(self, processes, slot_bytes):
+        self.processes = processes
+        self.slot_bytes = slot_bytes
+        self._executor = self._new_executor()
+
+        # 동시에 처리 중일 수 있는 프레임 수만큼 슬롯 준비 (워커당 2개)
+        self._segments = []
+        self._free_slots = queue.Queue()
+        for _ in range(processes * 2):
+            shm = shared_memory.SharedMemory(create=True, size=slot_bytes)
+            self._segments.append(shm)
+            self._free_slots.put(shm)
+
+        self.lock = threading.Lock()
+        self.decoded = 0
+        self.oversize = 0
+        self.errors = 0
+        self.pool_restarts = 0
+        self.fallback_decodes = 0
+        self.total_time = 0.0
+        self._closed = False
+        atexit.register(self.close)
+
+    def _new_executor(self):
+        # spawn: 스레드가 많은 Flask 프로세스를 fork 하지 않음
+        return ProcessPoolExecutor(max_workers=self.processes, mp_context=multiprocessing.get_context("spawn"))
+
+    def _run(self, fn, *args):
+        """워커 프로세스에서 실행 → 결과 (풀이 깨졌으면 새 풀로 교체하고 BrokenProcessPool)"""
+        executor = self._executor
+        try:
+            return executor.submit(fn, *args).result()
+        except BrokenProcessPool:
+            with self.lock:
+                # 동시에 실패한 다른 스레드가 이미 교체했으면 그대로 사용
+                if self._executor is executor and not self._closed:
+                    self._executor = self._new_executor()
+                    self.pool_restarts += 1
+                    print(f"[PROCPOOL] ❌ 디코딩 워커 프로세스 종료 감지 → 프로세스 풀 재시작 ({self.pool_restarts}회)")
+            executor.shutdown(wait=False)
+            raise
+
+    def decode(self, frame_data, roi=None, scale=1, stages=("fast", "full", "enhanced")):
+        """프레임 1장 디코딩 (호출 스레드는 결과가 올 때까지 대기)"""
+        started = time.time()
+        length = len(frame_data)
+        try:
+            if length > self.slot_bytes:
+                # 슬롯보다 큰 프레임은 예외적으로 bytes 그대로 전달
+                with self.lock:
+                    self.oversize += 1
+                result = self._run(decode_barcodes, bytes(frame_data), roi, scale, stages)
+            else:
+                shm = self._free_slots.get()
+                try:
+                    shm.buf[:length] = frame_data
+                    result = self._run(_decode_shared, shm.name, length, roi, scale, stages)
+                finally:
+                    self._free_slots.put(shm)
+        except BrokenProcessPool:
+            # 새 풀이 뜨는 동안 이 프레임은 호출 스레드에서 디코딩
+            with self.lock:
+                self.fallback_decodes += 1
+            result = decode_barcodes(frame_data, roi, scale, stages)
+        except Exception:
+            with self.lock:
+                self.errors += 1
+            raise
+
+        with self.lock:
+            self.decoded += 1
+            self.total_time += time.time() - started
+        return result
+
+    def stats(self):
+        with self.lock:
+            return {
+                "processes": self.processes,
+                "slots": len(self._segments),
+                "free_slots": self._free_slots.qsize(),
+                "slot_bytes": self.slot_bytes,
+                "decoded": self.decoded,
+                "oversize": self.oversize,
+                "errors": self.errors,
+                "pool_restarts": self.pool_restarts,
+                "fallback_decodes": self.fallback_decodes,
+                "avg_roundtrip_ms": round(self.total_time / (self.decoded or 1) * 1000, 2),
+            }
+
+    def close(self):
+        if self._closed:
+            return
+        self._closed = True
+        self._executor.shutdown(wait=False, cancel_futures=True)
+        for shm in self._segments:
+            try:
+                shm.close()
+                shm.unlink()
+            except Exception:
+                pass
@@ -0,0 +1,129 @@
+"""
+카메라별 바코드 검출 워커
+- 업로드마다 스레드를 만드는 대신 카메라당 전용 워커 스레드 1개
+- 대기열은 크기 1 슬롯 (최신 프레임 우선): 검출 중에 들어온 프레임은 최신 것만 남고 나머지는 버림
+"""
+import threading
+import time
+import datetime
+from config import MOTION_GATE_ENABLED
+from barcode.motion import MotionGate
+from barcode.detector import get_detector
+
+# cam_id → DetectionWorker
+detection_workers = {}
+
+
+class DetectionWorker:
+    """카메라 1대 전용 바코드 검출 워커 (해당 카메라의 BarcodeDetector 를 실행)"""
+
+    def __init__(self, detector, broadcast_fn=None):
+        self.cam_id = detector.cam_id
+        self.detector = detector
+        self.broadcast_fn = broadcast_fn
+        # 장면 변화가 없으면 디코딩 생략
+        self.gate = MotionGate(detector.roi) if MOTION_GATE_ENABLED else None
+
+        self.lock = threading.Lock()
+        self._frame_ready = threading.Condition(self.lock)
+        self._pending = None  # (frame_data, 제출 시각)
+
+        # 통계
+        self.submitted = 0
+        self.dropped = 0
+        self.processed = 0
+        self.errors = 0
+        self.last_latency = 0.0
+        self.max_latency = 0.0
+        self.total_latency = 0.0
+        self.total_wait = 0.0
+
+        self._thread = threading.Thread(
+            target=self._run, name=f"barcode-worker-{self.cam_id}", daemon=True
+        )
+
+    def start(self):
+        self._thread.start()
+        return self
+
+    def submit(self, frame_data):
+        """프레임 제출 (처리 전 프레임이 남아 있으면 교체하고 drop 집계)"""
+        with self._frame_ready:
+            if self._pending is not None:
+                self.dropped += 1
+            self._pending = (frame_data, time.time())
+            self.submitted += 1
+            self._frame_ready.notify()
+
+    def _run(self):
+        while True:
+            with self._frame_ready:
+                self._frame_ready.wait_for(lambda: self._pending is not None)
+                frame_data, submitted_at = self._pending
+                self._pending = None
+
+            if self.gate:
+                # 검출 간격 중이면 어차피 디코딩하지 않으므로 게이트 기준 프레임도 갱신하지 않음
+                if not self.detector.ready():
+                    continue
+                if not self.gate.should_decode(frame_data):
+                    continue
+
+            started = time.time()
+            try:
+                self.detector.detect(frame_data, self.broadcast_fn)
+            except Exception as e:
+                with self.lock:
+                    self.errors += 1
+                print(f"[{datetime.datetime.now():%H:%M:%S}] [WORKER] 카메라 {self.cam_id} 검출 오류: {e}")
+            finished = time.time()
+
+            latency = finished - started
+            with self.lock:
+                self.processed += 1
+                self.last_latency = latency
+                self.max_latency = max(self.max_latency, latency)
+                self.total_latency += latency
+                self.total_wait += started - submitted_at
+
+    def stats(self):
+        gate_stats = self.gate.stats() if self.gate else None
+        with self.lock:
+            processed = self.processed or 1
+            avg_latency = self.total_latency / processed
+            if gate_stats:
+                # 게이트로 생략한 프레임 x 평균 검출 시간 - 게이트 자체 비용
+                saved = gate_stats["gated"] * avg_latency
+                cost = (gate_stats["passed"] + gate_stats["gated"]) * gate_stats["avg_gate_ms"] / 1000
+                gate_stats["cpu_saved_sec"] = round(max(0.0, saved - cost), 2)
+            return {
+                "cam_id": self.cam_id,
+                "queue_depth": 1 if self._pending is not None else 0,
+                "submitted": self.submitted,
+                "processed": self.processed,
+                "dropped": self.dropped,
+                "errors": self.errors,
+                "last_latency_ms": round(self.last_latency * 1000, 2),
+                "avg_latency_ms": round(avg_latency * 1000, 2),
+                "max_latency_ms": round(self.max_latency * 1000, 2),
+                "avg_queue_wait_ms": round(self.total_wait / processed * 1000, 2),
+                "motion_gate": gate_stats,
+            }
+
+
+def start_detection_workers(cameras, broadcast_fn=None):
+    """검출 카메라마다 검출기 + 워커 1개 시작 (이미 있으면 재사용)"""
+    for camera in cameras:
+        if camera.cam_id not in detection_workers:
+            detector = get_detector(camera.cam_id, **camera.detection_options())
+            detection_workers[camera.cam_id] = DetectionWorker(detector, broadcast_fn).start()
+            print(f"[INIT] 바코드 검출 워커 시작: {camera.name}")
+    return detection_workers
+
+
+def get_detection_worker(cam_id):
+    return detection_workers.get(str(cam_id))
+
+
+def get_detection_worker_stats():
+    return {cam_id: worker.stats() for cam_id, worker in detection_workers.items()}
@@ -0,0 +1 @@
+# 빈 파일
\ No newline at end of file
@@ -0,0 +1,152 @@
+"""
+TCP 채팅 서버 동시 접속 / fan-out 지연 벤치마크
+- 채팅 서버(chat.server)를 이 프로세스의 스레드에서 띄우고, 클라이언트 N개가 동시에 LOGIN
+- 보내는 클라이언트 1개가 메시지를 보내면 나머지 N개가 받을 때까지의 지연 측정
+  → 수신자별 지연 p50/p99, 메시지별 '마지막 수신자까지' 지연 p50/p99
+  + 서버가 집계한 fan-out 지연(모든 수신자 대기열 → 송신 완료, /stats 의 chat) p50/p99
+- DB/인증은 측정 대상이 아니라서 verify_user 등은 즉시 성공하는 함수로 교체
+
+실행 (flask_server 폴더에서):
+    python -m bench.bench_chat_fanout [클라이언트 수 ...]
+"""
+import asyncio
+import contextlib
+import io
+import re
+import resource
+import sys
+import threading
+import time
+import uuid
+import chat.server as chat_server
+
+HOST = "127.0.0.1"
+PORT = 15000
+CLIENT_COUNTS = [100, 1000, 3000]
+MESSAGES = 50            # 측정할 메시지 수
+MESSAGE_INTERVAL = 0.02  # 메시지 간격(초)
+CONNECT_CONCURRENCY = 200
+
+_MARK_RE = re.compile(rb"#(\d+)#")
+
+
+def _fake_verify_user(emp_no, password, client_ip):
+    return True, "STAFF", uuid.uuid4().hex
+
+
+def patch_server():
+    """DB 를 쓰는 함수들을 즉시 반환하는 함수로 교체"""
+    chat_server.verify_user = _fake_verify_user
+    chat_server.cleanup_session = lambda session_id: None
+    chat_server.save_chat_message = lambda *args: None
+    chat_server.update_session_activity = lambda session_id: None
+    chat_server._delete_short_session_history = lambda *args: None
+    chat_server.chat_history.warm = lambda: 0
+    chat_server.LOGIN_PENDING_MAX = 1 << 30
+    chat_server.CHAT_HISTORY_REPLAY = 0  # 이전 실행의 메시지가 재전송되어 측정에 섞이지 않도록
+
+
+def raise_fd_limit():
+    soft, hard = resource.getrlimit(resource.RLIMIT_NOFILE)
+    if soft < hard:
+        resource.setrlimit(resource.RLIMIT_NOFILE, (hard, hard))
+    return hard
+
+
+def percentile(values, p):
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * p))]
+
+
+class Receiver:
+    def __init__(self, index):
+        self.emp_no = f"B{index:05d}"
+        self.received = {}  # 메시지 번호 → 수신 시각
+
+    async def connect(self, semaphore):
+        async with semaphore:
+            self.reader, self.writer = await asyncio.open_connection(HOST, PORT)
+            self.writer.write(f"LOGIN {self.emp_no} x\n".encode())
+            buf = b""
+            while b"LOGIN_OK" not in buf:
+                chunk = await self.reader.read(4096)
+                if not chunk:
+                    raise ConnectionError("로그인 실패")
+                buf += chunk
+
+    async def read_loop(self):
+        buf = b""
+        while True:
+            chunk = await self.reader.read(65536)
+            if not chunk:
+                return
+            now = time.perf_counter()
+            buf += chunk
+            for m in _MARK_RE.finditer(buf):
+                self.received.setdefault(int(m.group(1)), now)
+            buf = buf[-16:]
+
+
+async def run(count):
+    semaphore = asyncio.Semaphore(CONNECT_CONCURRENCY)
+    receivers = [Receiver(i) for i in range(count)]
+    started = time.perf_counter()
+    await asyncio.gather(*(r.connect(semaphore) for r in receivers))
+    login_time = time.perf_counter() - started
+
+    sender = Receiver(count)
+    await sender.connect(semaphore)
+    readers = [asyncio.ensure_future(r.read_loop()) for r in receivers]
+
+    sent = {}
+    for i in range(MESSAGES):
+        sent[i] = time.perf_counter()
+        sender.writer.write(f"fanout #{i}#\n".encode())
+        await sender.writer.drain()
+        await asyncio.sleep(MESSAGE_INTERVAL)
+    await asyncio.sleep(1.0)
+
+    per_recipient, per_message, missing = [], [], 0
+    for i, sent_at in sent.items():
+        arrivals = [r.received.get(i) for r in receivers]
+        got = [t - sent_at for t in arrivals if t is not None]
+        missing += len(arrivals) - len(got)
+        per_recipient.extend(got)
+        if got:
+            per_message.append(max(got))
+
+    for r in receivers + [sender]:
+        r.writer.close()
+    for task in readers:
+        task.cancel()
+    await asyncio.sleep(0.5)
+    return login_time, per_recipient, per_message, missing
+
+
+def main():
+    counts = [int(a) for a in sys.argv[1:]] or CLIENT_COUNTS
+    fd_limit = raise_fd_limit()
+    patch_server()
+
+    sink = io.StringIO()
+    threading.Thread(target=chat_server.start_tcp_server, args=(HOST, PORT), daemon=True).start()
+    time.sleep(0.5)
+
+    print(f"메시지 {MESSAGES}개, 간격 {MESSAGE_INTERVAL * 1000:.0f}ms (fd 한도 {fd_limit})")
+    print(f"{'clients':>8} | {'login s':>8} | {'recv p50':>9} {'recv p99':>9} | {'msg p50':>9} {'msg p99':>9} | "
+          f"{'srv p50':>9} {'srv p99':>9} | {'missing':>7}")
+    for count in counts:
+        chat_server._fanout_samples.clear()
+        with contextlib.redirect_stdout(sink):
+            login_time, per_recipient, per_message, missing = asyncio.run(run(count))
+        sink.seek(0)
+        sink.truncate()
+        server_stats = chat_server.get_chat_stats()
+        ms = lambda values, p: f"{percentile(values, p) * 1000:>7.2f}ms" if values else f"{'-':>9}"
+        print(f"{count:>8} | {login_time:>8.2f} | {ms(per_recipient, 0.5)} {ms(per_recipient, 0.99)} | "
+              f"{ms(per_message, 0.5)} {ms(per_message, 0.99)} | "
+              f"{server_stats['fanout_p50_ms']:>7.2f}ms {server_stats['fanout_p99_ms']:>7.2f}ms | {missing:>7}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,85 @@
+"""
+로그인(verify_user) DB 왕복 횟수 벤치마크
+- 이전 세션이 0 / 10 / 100 / 1000개 남아 있는 상태에서 로그인 1회에 실행되는 SQL 문 수와 시간 측정
+- SQL 문 수는 engine 의 before_cursor_execute 이벤트로 집계 (executemany 도 1회)
+- 이전 방식은 이전 세션 1개당 UPDATE 1번(5초 이상) / UPDATE+DELETE 2번(1초 이내)이 추가되어
+  세션 수에 비례했지만, 지금은 계정 조회 1 + 세션 트랜잭션 7 로 고정
+
+실행 (flask_server 폴더에서, 설정된 DB 에 테스트 계정 필요):
+    python -m bench.bench_login_roundtrips <emp_no> <password>
+
+벤치마크가 만든 세션/이력 행(session_id 'bench-...')과 로그인 세션은 끝나면 삭제
+"""
+import sys
+import time
+import uuid
+from sqlalchemy import event
+from db.manager import engine, text, verify_user, cleanup_session
+
+STALE_COUNTS = [0, 10, 100, 1000]
+CLIENT_IP = "127.0.0.1"
+
+_statements = []
+
+
+def _count_statement(conn, cursor, statement, parameters, context, executemany):
+    _statements.append(statement)
+
+
+def seed_sessions(emp_no, count):
+    """5초 이상 된 정규 세션 count 개 + 로그인 이력 생성"""
+    if not count:
+        return
+    rows = [{"e": emp_no, "s": f"bench-{uuid.uuid4().hex}", "ip": CLIENT_IP} for _ in range(count)]
+    with engine.begin() as conn:
+        conn.execute(text("""
+            INSERT INTO user_session(emp_no, session_id, session_type, client_ip, is_temporary, login_time)
+            VALUES (:e, :s, 'TCP', :ip, 0, NOW() - INTERVAL 10 MINUTE)
+        """), rows)
+        conn.execute(text("""
+            INSERT INTO login_history(emp_no, session_id, session_type, client_ip, login_status, login_time)
+            VALUES (:e, :s, 'TCP', :ip, 'SUCCESS', NOW() - INTERVAL 10 MINUTE)
+        """), rows)
+
+
+def remove_bench_rows(session_ids):
+    with engine.begin() as conn:
+        conn.execute(text("DELETE FROM login_history WHERE session_id LIKE 'bench-%'"))
+        conn.execute(text("DELETE FROM user_session WHERE session_id LIKE 'bench-%'"))
+    for session_id in session_ids:
+        cleanup_session(session_id)
+
+
+def main():
+    if len(sys.argv) != 3:
+        print(__doc__)
+        sys.exit(1)
+    emp_no, password = sys.argv[1], sys.argv[2]
+
+    # 비밀번호 검증(bcrypt) 시간은 제외하도록 1번 미리 로그인 (검증 캐시 적재)
+    ok, _role, warm_session = verify_user(emp_no, password, CLIENT_IP)
+    if not ok:
+        print(f"로그인 실패: {emp_no} (테스트 계정/비밀번호 확인)")
+        sys.exit(1)
+    created = [warm_session]
+
+    event.listen(engine, "before_cursor_execute", _count_statement)
+    try:
+        print(f"{'stale':>6} | {'statements':>10} {'login ms':>9}")
+        for count in STALE_COUNTS:
+            seed_sessions(emp_no, count)
+            time.sleep(6)  # 직전 로그인 세션도 '5초 이상 된 세션' 이 되도록
+
+            _statements.clear()
+            started = time.perf_counter()
+            ok, _role, session_id = verify_user(emp_no, password, CLIENT_IP)
+            elapsed = time.perf_counter() - started
+            created.append(session_id)
+            print(f"{count:>6} | {len(_statements):>10} {elapsed * 1000:>9.1f}")
+    finally:
+        event.remove(engine, "before_cursor_execute", _count_statement)
+        remove_bench_rows([s for s in created if s])
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,60 @@
+"""
+MJPEG 뷰어 fan-out 벤치마크
+- 기존 방식: 뷰어마다 b'--frame...' + frame + b'\\r\\n' 로 새 버퍼를 만들어 복사
+- 공유 방식: update() 에서 1번 만든 multipart 파트를 모든 뷰어가 그대로 사용
+
+실행 (flask_server 폴더에서):
+    python -m bench.bench_mjpeg_fanout
+"""
+import os
+import time
+from web.cameras import CameraSlot, MJPEG_PART_HEADER
+
+FRAME_SIZE = 50 * 1024   # 640x480 JPEG 평균 크기
+INGEST_FPS = 30          # 라즈베리파이 업로드 속도
+FRAMES = 300             # 측정할 프레임 수
+VIEWER_COUNTS = [1, 5, 10, 20, 50]
+
+
+def run_legacy(frames, viewers):
+    """기존 방식: 뷰어별 bytes 연결 → (복사 바이트, 소요 시간)"""
+    copied = 0
+    start = time.perf_counter()
+    for frame in frames:
+        for _ in range(viewers):
+            part = MJPEG_PART_HEADER + frame + b'\r\n'
+            copied += len(part)
+    return copied, time.perf_counter() - start
+
+
+def run_shared(frames, viewers):
+    """공유 방식: CameraSlot.update() 1회 + 뷰어는 같은 chunk 참조"""
+    camera = CameraSlot("bench")
+    last_seqs = [0] * viewers
+    copied = 0
+    start = time.perf_counter()
+    for frame in frames:
+        camera.update(frame)
+        copied += len(camera.chunk)  # 프레임당 1번만 조립
+        for i in range(viewers):
+            last_seqs[i], _chunk = camera.wait_for_chunk(last_seqs[i], timeout=0)
+    return copied, time.perf_counter() - start
+
+
+def main():
+    frames = [os.urandom(FRAME_SIZE) for _ in range(8)]
+    frames = [frames[i % len(frames)] for i in range(FRAMES)]
+    seconds = FRAMES / INGEST_FPS
+
+    print(f"프레임 {FRAME_SIZE // 1024}KB x {FRAMES}장 @ {INGEST_FPS}fps 기준 (초당 복사량)")
+    print(f"{'viewers':>8} | {'legacy MB/s':>12} {'legacy ms/s':>12} | {'shared MB/s':>12} {'shared ms/s':>12}")
+    for viewers in VIEWER_COUNTS:
+        legacy_bytes, legacy_time = run_legacy(frames, viewers)
+        shared_bytes, shared_time = run_shared(frames, viewers)
+        print(f"{viewers:>8} | "
+              f"{legacy_bytes / seconds / 1e6:>12.2f} {legacy_time / seconds * 1000:>12.2f} | "
+              f"{shared_bytes / seconds / 1e6:>12.2f} {shared_time / seconds * 1000:>12.2f}")
+
+
+if __name__ == "__main__":
+    main()
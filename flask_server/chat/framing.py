@@ -0,0 +1,51 @@
+"""
+채팅 메시지 프레이밍 (줄바꿈 구분)
+- recv 1번 = 메시지 1개로 보지 않고, 연결별 수신 버퍼에 쌓아서 b"\\n" 단위로 분리
+  → 1024 바이트 경계에서 잘린 긴 한글 메시지 / 한 번에 붙어서 온 여러 메시지 모두 정상 처리
+- UTF-8 다중 바이트 문자 안에는 0x0A 가 나올 수 없으므로 완성된 줄만 디코딩하면
+  코드포인트 중간에서 끊기는 일이 없음 (증분 디코딩과 같은 결과)
+- 수신 버퍼(bytearray)는 연결이 끝날 때까지 재사용, 처리한 앞부분만 잘라냄
+"""
+from config import CHAT_MAX_LINE_BYTES
+
+
+class FrameTooLong(Exception):
+    """줄바꿈 없이 CHAT_MAX_LINE_BYTES 를 넘는 데이터"""
+
+
+class LineFramer:
+    """연결 1개의 수신 버퍼 + 줄 분리"""
+    __slots__ = ("buffer", "max_line", "_scanned")
+
+    def __init__(self, max_line=CHAT_MAX_LINE_BYTES):
+        self.buffer = bytearray()
+        self.max_line = max_line
+        self._scanned = 0  # 이미 줄바꿈이 없다고 확인한 앞부분 길이
+
+    def feed(self, data):
+        """받은 데이터 추가 → 완성된 줄 목록 (앞뒤 공백 제거, 잘못된 UTF-8 은 대체 문자)"""
+        buf = self.buffer
+        buf += data
+        lines = []
+        start = 0
+        while True:
+            end = buf.find(b"\n", max(start, self._scanned))
+            if end < 0:
+                break
+            lines.append(buf[start:end].decode("utf-8", errors="replace").strip())
+            start = end + 1
+        if start:
+            del buf[:start]
+        self._scanned = len(buf)
+        if len(buf) > self.max_line:
+            raise FrameTooLong(f"{len(buf)} 바이트")
+        return lines
+
+    def flush(self):
+        """연결 종료 시 줄바꿈 없이 남은 마지막 메시지 (없으면 None)"""
+        if not self.buffer:
+            return None
+        line = self.buffer.decode("utf-8", errors="replace").strip()
+        self.buffer.clear()
+        self._scanned = 0
+        return line
@@ -0,0 +1,94 @@
+"""
+최근 채팅 기록 링 버퍼
+- 최근 CHAT_HISTORY_SIZE 개 메시지를 메모리에 유지 (시작 시 chat_message 에서 채움)
+- 로그인 직후 최근 CHAT_HISTORY_REPLAY 개를 DB 조회 없이 바로 전송
+- 기록 줄은 실시간 메시지와 같은 형식([HH:MM:SS] <emp_no> > <content>, 오늘이 아니면 날짜 포함)
+  → 클라이언트는 별도 파싱 없이 그대로 표시
+- 목록 끝에 SERVER: HISTORY_END <개수> <cursor> (cursor 는 가장 오래된 메시지의 msg_uid, 없으면 생략)
+- 더 이전 기록은 HISTORY <cursor> <n> 명령으로 DB 에서 (created_at, id) keyset 페이지 조회
+- msg_uid 는 메시지를 받을 때 만들어 DB 에도 같은 값으로 저장 → 저장 전 메시지도 cursor 로 사용 가능
+- 채팅 서버가 채널 1개(전체 방송)라서 링도 1개
+"""
+import datetime
+import threading
+import uuid
+from collections import deque
+from config import CHAT_HISTORY_SIZE
+
+
+class HistoryEntry:
+    """채팅 메시지 1개"""
+    __slots__ = ("uid", "emp_no", "content", "created_at")
+
+    def __init__(self, uid, emp_no, content, created_at):
+        self.uid = uid
+        self.emp_no = emp_no
+        self.content = content
+        self.created_at = created_at
+
+    def encode(self, today=None):
+        """전송용 한 줄 (실시간 broadcast 와 같은 형식)"""
+        if self.created_at.date() == (today or datetime.date.today()):
+            stamp = f"{self.created_at:%H:%M:%S}"
+        else:
+            stamp = f"{self.created_at:%Y-%m-%d %H:%M:%S}"
+        return f"[{stamp}] {self.emp_no} > {self.content}\n".encode("utf-8")
+
+
+def encode_history(entries):
+    """기록 목록 → 전송 bytes (마지막 줄 HISTORY_END <개수> <다음 cursor>)"""
+    today = datetime.date.today()
+    lines = [entry.encode(today) for entry in entries]
+    cursor = entries[0].uid if entries else None
+    end = f"SERVER: HISTORY_END {len(entries)} {cursor}" if cursor else f"SERVER: HISTORY_END {len(entries)}"
+    lines.append(f"{end}\n".encode("ascii"))
+    return b"".join(lines)
+
+
+class ChatHistory:
+    """최근 메시지 링 (추가는 이벤트 루프, 조회는 로그인 처리)"""
+
+    def __init__(self, size=CHAT_HISTORY_SIZE):
+        self.lock = threading.Lock()
+        self._ring = deque(maxlen=size)
+        self.warmed = 0
+
+    def warm(self):
+        """시작 시 DB 의 최근 메시지로 채움"""
+        from db.manager import get_recent_chat_messages
+        try:
+            rows = get_recent_chat_messages(self._ring.maxlen)
+        except Exception as e:
+            print(f"[CHAT] 채팅 기록 로드 오류: {e}")
+            return 0
+        with self.lock:
+            self._ring.extend(HistoryEntry(r["uid"], r["emp_no"], r["content"], r["created_at"]) for r in rows)
+            self.warmed = len(rows)
+        print(f"[CHAT] 최근 채팅 기록 {len(rows)}개 로드")
+        return len(rows)
+
+    def append(self, emp_no, content, created_at=None):
+        """새 메시지 추가 (msg_uid 생성) → HistoryEntry"""
+        entry = HistoryEntry(uuid.uuid4().hex, emp_no, content,
+                             created_at or datetime.datetime.now().replace(microsecond=0))
+        with self.lock:
+            self._ring.append(entry)
+        return entry
+
+    def recent(self, limit):
+        with self.lock:
+            if limit <= 0:
+                return []
+            return list(self._ring)[-limit:]
+
+    def stats(self):
+        with self.lock:
+            return {
+                "entries": len(self._ring),
+                "capacity": self._ring.maxlen,
+                "warmed": self.warmed,
+            }
+
+
+# 전역 채팅 기록 (채팅 서버 시작 시 warm)
+chat_history = ChatHistory()
@@ -0,0 +1,76 @@
+"""
+채팅 접속자 목록 (연결/사원번호/세션 ID 색인)
+- 로그인/종료/중복 로그인/세션 만료 처리에서 목록 전체를 훑지 않고 dict 로 바로 조회
+- broadcast 는 snapshot() 의 튜플을 락 밖에서 순회 (목록이 바뀔 때만 새로 만듦)
+"""
+import threading
+import time
+
+
+class ClientConnection:
+    """로그인한 연결 1개"""
+    __slots__ = ("writer", "addr", "emp_no", "session_id", "outbound", "connected_at")
+
+    def __init__(self, writer, addr, emp_no, session_id, outbound):
+        self.writer = writer
+        self.addr = addr
+        self.emp_no = emp_no
+        self.session_id = session_id
+        self.outbound = outbound
+        self.connected_at = time.time()
+
+
+class ClientRegistry:
+    """연결 / 사원번호 / 세션 ID 로 O(1) 조회하는 접속자 목록"""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self._by_writer = {}   # writer → ClientConnection (등록 순서 유지)
+        self._by_emp = {}      # emp_no → {writer: ClientConnection}
+        self._by_session = {}  # session_id → ClientConnection
+        self._snapshot = ()
+
+    def add(self, conn):
+        with self.lock:
+            self._by_writer[conn.writer] = conn
+            self._by_emp.setdefault(conn.emp_no, {})[conn.writer] = conn
+            if conn.session_id:
+                self._by_session[conn.session_id] = conn
+            self._snapshot = None
+
+    def remove(self, conn):
+        """목록에서 제거 → 있었으면 True"""
+        with self.lock:
+            if self._by_writer.pop(conn.writer, None) is None:
+                return False
+            same_emp = self._by_emp.get(conn.emp_no)
+            if same_emp is not None:
+                same_emp.pop(conn.writer, None)
+                if not same_emp:
+                    del self._by_emp[conn.emp_no]
+            if self._by_session.get(conn.session_id) is conn:
+                del self._by_session[conn.session_id]
+            self._snapshot = None
+            return True
+
+    def get(self, writer):
+        with self.lock:
+            return self._by_writer.get(writer)
+
+    def by_emp(self, emp_no):
+        with self.lock:
+            return list(self._by_emp.get(emp_no, {}).values())
+
+    def by_session(self, session_id):
+        with self.lock:
+            return self._by_session.get(session_id)
+
+    def snapshot(self):
+        """현재 접속자 튜플 (변경이 없으면 같은 튜플 재사용)"""
+        with self.lock:
+            if self._snapshot is None:
+                self._snapshot = tuple(self._by_writer.values())
+            return self._snapshot
+
+    def __len__(self):
+        return len(self._by_writer)
@@ -1,187 +1,489 @@
 """
-TCP 채팅 서버
+TCP 채팅 서버 (asyncio 이벤트 루프)
+- 연결마다 스레드를 만들지 않고, 전용 스레드 1개의 이벤트 루프에서 모든 클라이언트 처리
+- DB/인증(verify_user, 세션 정리)은 블로킹이라 executor 스레드에서 실행 → 루프는 멈추지 않음
+- 다른 스레드(바코드 검출, 세션 만료 등)에서의 broadcast/연결 종료는 call_soon_threadsafe 로 루프에 전달
+- 송신은 클라이언트별 대기열 + writer 태스크 (broadcast 는 1번 인코딩한 bytes 를 대기열에 넣기만 함)
+  → 느린 클라이언트 1개가 다른 수신자를 막지 않음, 대기열 한도/송신 시간 초과 시 그 클라이언트만 연결 종료
+- 프로토콜은 그대로: 첫 메시지 LOGIN <emp_no> <password> → SERVER: LOGIN_OK <role>
+- 메시지는 줄바꿈 단위 (chat.framing), 한 번 읽은 데이터에서 여러 메시지를 꺼내 처리
+- 로그인 직후 최근 채팅 기록 재전송, HISTORY <cursor> <n> 으로 이전 기록 조회 (chat.history)
 """
-import socket
+import asyncio
+import re
 import threading
 import datetime
-from config import TCP_HOST, TCP_PORT
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from config import TCP_HOST, TCP_PORT, TCP_LISTEN_BACKLOG, CHAT_DB_WORKERS, AUTH_WORKERS, AUTH_QUEUE_LIMIT
+from config import CHAT_OUTBOUND_MAX_MESSAGES, CHAT_OUTBOUND_MAX_BYTES, CHAT_SEND_TIMEOUT, CHAT_FANOUT_SAMPLES
+from config import CHAT_READ_BYTES, CHAT_MAX_LINE_BYTES, CHAT_HISTORY_REPLAY, CHAT_HISTORY_PAGE_MAX
 from db.manager import verify_user, cleanup_session, update_session_activity, save_chat_message
+from db.manager import register_session_expiry_listener
+from db.manager import flush_write_behind, get_recent_chat_messages, get_chat_messages_before
+from db.password import AuthBusy
+from chat.registry import ClientConnection, ClientRegistry
+from chat.framing import FrameTooLong, LineFramer
+from chat.history import HistoryEntry, chat_history, encode_history
 
-# 클라이언트 목록 (전역)
-clients = []
-clients_lock = threading.Lock()
+# HISTORY 명령의 cursor (msg_uid, uuid4 hex)
+_CURSOR_RE = re.compile(r"^[0-9a-f]{32}$")
 
+# 클라이언트 목록 (전역, 변경은 이벤트 루프 스레드에서만)
+clients = ClientRegistry()
 
-def broadcast(message_bytes: bytes, sender_sock: socket.socket):
-    """모든 클라이언트에게 메시지 브로드캐스트"""
-    with clients_lock:
-        dead = []
-        for client_info in clients:
-            csock, addr, _authed = client_info[:3]
-            if csock is sender_sock:
-                continue
-            try:
-                csock.sendall(message_bytes)
-            except:
-                dead.append(client_info)
-        for d in dead:
-            clients.remove(d)
-            try: 
-                d[0].close()
-            except: 
-                pass
-
-
-def force_disconnect_duplicate_sessions(emp_no: str, current_socket: socket.socket):
-    """중복 세션의 기존 소켓 연결 강제 종료"""
-    with clients_lock:
-        disconnected = []
-        for client_info in list(clients):
-            if len(client_info) >= 3 and client_info[2] == emp_no:
-                if client_info[0] != current_socket:
-                    try:
-                        client_info[0].sendall(
-                            "SERVER: DUPLICATE_LOGIN - 다른 곳에서 로그인되어 연결을 종료합니다.\n".encode("utf-8")
-                        )
-                        client_info[0].close()
-                        disconnected.append(client_info)
-                    except:
-                        pass
-        
-        for client_info in disconnected:
-            if client_info in clients:
-                clients.remove(client_info)
-        
-        if disconnected:
-            print(f"[AUTH] {emp_no} 중복 연결 {len(disconnected)}개 강제 종료")
-
-
-def handle_client(client_socket: socket.socket, addr):
+# 채팅 이벤트 루프 (start_tcp_server 스레드에서 생성)
+_loop = None
+
+# 블로킹 DB/인증 호출용 스레드 (로그인/세션 정리)
+_db_executor = ThreadPoolExecutor(max_workers=CHAT_DB_WORKERS, thread_name_prefix="chat-db")
+# 채팅 메시지 저장 (write-behind 큐가 가득 차면 잠시 막힐 수 있어 루프 밖에서, 순서 유지를 위해 1개)
+_write_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="chat-write")
+
+# 동시에 진행 중인 로그인 수 제한 (비밀번호 검증 한도와 같게, 넘치면 바로 LOGIN_BUSY)
+LOGIN_PENDING_MAX = AUTH_WORKERS + AUTH_QUEUE_LIMIT
+_pending_logins = 0
+
+
+def _on_loop():
+    try:
+        return asyncio.get_running_loop() is _loop
+    except RuntimeError:
+        return False
+
+
+def _call_on_loop(fn, *args):
+    """이벤트 루프 스레드에서 fn 실행 (다른 스레드면 루프에 예약)"""
+    loop = _loop
+    if loop is None or loop.is_closed():
+        return
+    if _on_loop():
+        fn(*args)
+    else:
+        loop.call_soon_threadsafe(fn, *args)
+
+
+# 송신/fan-out 통계 (이벤트 루프에서 갱신, /stats 에서 읽음)
+_chat_stats_lock = threading.Lock()
+_fanout_samples = deque(maxlen=CHAT_FANOUT_SAMPLES)  # 메시지별 마지막 수신자까지 걸린 시간(초)
+_chat_stats = {
+    "broadcasts": 0,
+    "deliveries": 0,
+    "evicted_queue_full": 0,
+    "evicted_send_timeout": 0,
+    "peak_queue_messages": 0,
+}
+
+
+class _Fanout:
+    """
+    broadcast 1건: 모든 수신자에게 보낸 데이터가 커널 소켓 버퍼로 다 넘어가면 소요 시간 기록
+    (전송 버퍼에 남아 있는 수신자는 writer 태스크의 drain 이 끝날 때 완료 → 느린 수신자 지연이 그대로 잡힘)
+    """
+    __slots__ = ("started", "remaining")
+
+    def __init__(self, remaining):
+        self.started = time.perf_counter()
+        self.remaining = remaining
+
+    def done(self):
+        self.remaining -= 1
+        if self.remaining == 0:
+            elapsed = time.perf_counter() - self.started
+            with _chat_stats_lock:
+                _fanout_samples.append(elapsed)
+
+
+class Outbound:
+    """
+    클라이언트 1개의 송신 대기열 + writer 태스크 (이벤트 루프에서만 사용)
+    - 소켓이 밀려 있지 않으면 바로 송신, 밀려 있으면 대기열에 모아 writer 태스크가 한 번에 송신
+    - writer 태스크는 drain 이 CHAT_SEND_TIMEOUT 넘게 걸리면 연결 종료
+    - 전송 버퍼 high-water 를 0 으로 두어 drain 은 버퍼가 완전히 빌 때 반환
+    """
+
+    def __init__(self, writer, addr):
+        self.writer = writer
+        self.addr = addr
+        self.pending = deque()  # (bytes, _Fanout | None)
+        self.pending_bytes = 0
+        self.unflushed = []  # 바로 송신했지만 전송 버퍼에 남은 broadcast 의 _Fanout
+        self.flushing = []   # writer 태스크가 drain 을 기다리는 _Fanout
+        self.closing = False  # 남은 데이터를 보낸 뒤 연결 종료
+        self.evicted = False
+        self._ready = asyncio.Event()
+        writer.transport.set_write_buffer_limits(high=0)
+        self.task = asyncio.ensure_future(self._run())
+
+    def send(self, data: bytes, fanout=None):
+        """송신 (소켓이 밀려 있으면 대기열에 추가, 한도를 넘으면 연결 종료 후 False)"""
+        if self.closing or self.evicted:
+            return False
+        if not self.pending and not self.writer.transport.get_write_buffer_size():
+            # 밀린 데이터 없음 → 바로 소켓에 (writer 태스크를 깨우지 않음)
+            self.writer.write(data)
+            if fanout is not None:
+                if self.writer.transport.get_write_buffer_size():
+                    # 소켓이 다 받지 못함 → writer 태스크가 drain 후 완료
+                    self.unflushed.append(fanout)
+                    self._ready.set()
+                else:
+                    fanout.done()
+            return True
+        if len(self.pending) >= CHAT_OUTBOUND_MAX_MESSAGES or self.pending_bytes + len(data) > CHAT_OUTBOUND_MAX_BYTES:
+            self.evict("queue_full")
+            return False
+        self.pending.append((data, fanout))
+        self.pending_bytes += len(data)
+        self._ready.set()
+        return True
+
+    def close(self, last_message: bytes = None):
+        """(마지막 메시지를 포함해) 대기 중인 데이터를 보낸 뒤 연결 종료"""
+        if last_message:
+            self.send(last_message)
+        self.closing = True
+        self._ready.set()
+
+    def evict(self, reason):
+        """느린 클라이언트 즉시 종료 (대기 데이터 버림 → 읽기 루프가 끊김을 감지)"""
+        if self.evicted:
+            return
+        self.evicted = True
+        with _chat_stats_lock:
+            _chat_stats[f"evicted_{reason}"] += 1
+        print(f"[{datetime.datetime.now():%H:%M:%S}] [CHAT] 느린 클라이언트 연결 종료 ({reason}): {self.addr}")
+        self._drop_pending()
+        self._ready.set()
+        try:
+            self.writer.transport.abort()
+        except Exception:
+            pass
+
+    def _drop_pending(self):
+        # 이 수신자는 포기 (fan-out 지연 집계가 멈추지 않도록)
+        while self.pending:
+            _, fanout = self.pending.popleft()
+            if fanout is not None:
+                fanout.done()
+        self.pending_bytes = 0
+        self._complete(self.unflushed)
+        self._complete(self.flushing)
+
+    @staticmethod
+    def _complete(fanouts):
+        for fanout in fanouts:
+            fanout.done()
+        fanouts.clear()
+
+    async def _run(self):
+        try:
+            while not self.evicted:
+                await self._ready.wait()
+                self._ready.clear()
+
+                self.flushing, self.unflushed = self.unflushed, []
+                wrote = bool(self.pending)
+                if wrote:
+                    with _chat_stats_lock:
+                        _chat_stats["peak_queue_messages"] = max(_chat_stats["peak_queue_messages"], len(self.pending))
+                    batch = []
+                    while self.pending:
+                        data, fanout = self.pending.popleft()
+                        batch.append(data)
+                        if fanout is not None:
+                            self.flushing.append(fanout)
+                    self.pending_bytes = 0
+                    self.writer.write(b"".join(batch))
+                if wrote or self.flushing:
+                    await asyncio.wait_for(self.writer.drain(), CHAT_SEND_TIMEOUT)
+                    self._complete(self.flushing)
+
+                if self.closing and not self.pending:
+                    self.writer.close()
+                    return
+        except asyncio.TimeoutError:
+            self.evict("send_timeout")
+        except (ConnectionError, RuntimeError):
+            self.evicted = True
+            self._drop_pending()
+
+
+def _broadcast_on_loop(message_bytes: bytes, sender):
+    # 락은 snapshot 을 가져올 때만
+    targets = [c.outbound for c in clients.snapshot() if c.writer is not sender]
+    if not targets:
+        return
+    fanout = _Fanout(len(targets))
+    delivered = 0
+    for outbound in targets:
+        if outbound.send(message_bytes, fanout):
+            delivered += 1
+        else:
+            fanout.done()
+    with _chat_stats_lock:
+        _chat_stats["broadcasts"] += 1
+        _chat_stats["deliveries"] += delivered
+
+
+def broadcast(message_bytes: bytes, sender=None):
+    """모든 클라이언트에게 메시지 브로드캐스트 (어느 스레드에서든 호출 가능, 줄바꿈으로 끝나게 맞춤)"""
+    if not message_bytes.endswith(b"\n"):
+        message_bytes += b"\n"
+    _call_on_loop(_broadcast_on_loop, message_bytes, sender)
+
+
+def force_disconnect_duplicate_sessions(emp_no: str, current_writer):
+    """중복 세션의 기존 연결 강제 종료 (이벤트 루프에서 호출)"""
+    disconnected = [c for c in clients.by_emp(emp_no) if c.writer is not current_writer]
+    for conn in disconnected:
+        clients.remove(conn)
+        conn.outbound.close("SERVER: DUPLICATE_LOGIN - 다른 곳에서 로그인되어 연결을 종료합니다.\n".encode("utf-8"))
+
+    if disconnected:
+        print(f"[AUTH] {emp_no} 중복 연결 {len(disconnected)}개 강제 종료")
+
+
+def _disconnect_sessions_on_loop(session_ids):
+    targets = [c for c in map(clients.by_session, session_ids) if c is not None]
+    for conn in targets:
+        conn.outbound.close("SERVER: SESSION_TIMEOUT - 장시간 활동이 없어 연결을 종료합니다.\n".encode("utf-8"))
+    if targets:
+        print(f"[SESSION] 만료된 TCP 연결 {len(targets)}개 종료")
+
+
+def disconnect_expired_sessions(session_ids):
+    """세션 만료 스케줄러 콜백: 만료된 세션의 TCP 연결 종료 (정리는 handle_client finally 에서)"""
+    _call_on_loop(_disconnect_sessions_on_loop, list(session_ids))
+
+
+def _delete_short_session_history(session_id, authed_emp, session_duration):
+    """5초 이내에 끊긴 세션은 히스토리에서 삭제 (executor 스레드)"""
+    try:
+        from db.manager import engine, text
+        with engine.begin() as conn:
+            conn.execute(
+                text("DELETE FROM login_history WHERE session_id = :sid"),
+                {"sid": session_id}
+            )
+        now = datetime.datetime.now().strftime("%H:%M:%S")
+        print(f"[{now}] [CLEANUP] 짧은 세션 히스토리 삭제: {authed_emp} (지속시간: {session_duration:.1f}초)")
+    except Exception as e:
+        print(f"[CLEANUP] 히스토리 삭제 오류: {e}")
+
+
+async def _login(emp_no, password, client_ip):
+    """verify_user 를 executor 에서 실행 (진행 중 로그인이 한도를 넘으면 바로 AuthBusy)"""
+    global _pending_logins
+    if _pending_logins >= LOGIN_PENDING_MAX:
+        raise AuthBusy("진행 중인 로그인 한도 초과")
+    _pending_logins += 1
+    try:
+        return await _loop.run_in_executor(_db_executor, verify_user, emp_no, password, client_ip)
+    finally:
+        _pending_logins -= 1
+
+
+def _load_history(cursor, limit):
+    """HISTORY 명령: cursor(msg_uid) 메시지 이전 기록 (cursor 가 없으면 최신부터) - executor 스레드"""
+    # cursor 가 아직 write-behind 대기 중인 메시지일 수 있으므로 먼저 저장
+    flush_write_behind("chat_message")
+    if cursor:
+        rows = get_chat_messages_before(cursor, limit)
+    else:
+        rows = get_recent_chat_messages(limit)
+    return [HistoryEntry(r["uid"], r["emp_no"], r["content"], r["created_at"]) for r in rows]
+
+
+async def _send_history(outbound, command):
+    """HISTORY <cursor> <n> / HISTORY <n> (최신부터) 처리"""
+    parts = command.split()
+    if len(parts) not in (2, 3) or not parts[-1].isdigit() or (len(parts) == 3 and not _CURSOR_RE.match(parts[1])):
+        outbound.send("SERVER: 형식 오류. HISTORY <cursor> <n>\n".encode("utf-8"))
+        return
+    cursor = parts[1] if len(parts) == 3 else None
+    limit = max(1, min(int(parts[-1]), CHAT_HISTORY_PAGE_MAX))
+    try:
+        entries = await _loop.run_in_executor(_db_executor, _load_history, cursor, limit)
+    except Exception as e:
+        print(f"[CHAT] 채팅 기록 조회 오류: {e}")
+        outbound.send(b"SERVER: HISTORY_FAIL\n")
+        return
+    outbound.send(encode_history(entries))
+
+
+async def _read_lines(reader, framer):
+    """수신 데이터를 줄 단위로 (읽기 1번에 여러 줄), 연결이 끝나면 남은 데이터를 마지막 줄로"""
+    while True:
+        data = await reader.read(CHAT_READ_BYTES)
+        if not data:
+            last = framer.flush()
+            if last:
+                yield last
+            return
+        for line in framer.feed(data):
+            yield line
+
+
+async def handle_client(reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
     """클라이언트 연결 처리"""
+    addr = writer.get_extra_info("peername")
     print(f"[TCP 연결] {addr} 접속")
     authed_emp = None
     session_id = None
     login_time_obj = None  # 🆕 로그인 시간 저장
-    
+    conn = None
+    outbound = Outbound(writer, addr)
+    lines = _read_lines(reader, LineFramer())
+
     try:
-        first = client_socket.recv(1024)
-        if not first:
+        try:
+            first_msg = await lines.__anext__()
+        except StopAsyncIteration:
             print("[TCP] 첫 패킷 없음")
             return
 
-        first_msg = first.decode("utf-8").strip()
         if not first_msg.startswith("LOGIN "):
-            client_socket.sendall(
+            outbound.send(
                 "SERVER: LOGIN 먼저 수행하세요. 형식: LOGIN <emp_no> <password>\n".encode("utf-8")
             )
             return
 
         parts = first_msg.split(" ", 2)
         if len(parts) != 3:
-            client_socket.sendall("SERVER: 형식 오류. LOGIN <emp_no> <password>\n".encode("utf-8"))
+            outbound.send("SERVER: 형식 오류. LOGIN <emp_no> <password>\n".encode("utf-8"))
             return
-        
+
         emp_no, password = parts[1].strip(), parts[2]
         client_ip = addr[0]
-        
+
         # 🆕 로그인 시간 기록
-        import datetime
         login_time_obj = datetime.datetime.now()
-        
-        ok, role, sess_id = verify_user(emp_no, password, client_ip)
+
+        try:
+            ok, role, sess_id = await _login(emp_no, password, client_ip)
+        except AuthBusy:
+            # 재접속 폭주 중 → 클라이언트가 잠시 후 다시 시도
+            outbound.send(b"SERVER: LOGIN_BUSY\n")
+            return
 
         if not ok:
-            client_socket.sendall(b"SERVER: LOGIN_FAIL\n")
+            outbound.send(b"SERVER: LOGIN_FAIL\n")
             return
 
         authed_emp = emp_no
         session_id = sess_id
-        
+
         # 기존 중복 연결 강제 종료
-        force_disconnect_duplicate_sessions(emp_no, client_socket)
-        
+        force_disconnect_duplicate_sessions(emp_no, writer)
+
         # 새 클라이언트 등록
-        with clients_lock:
-            clients.append([client_socket, addr, authed_emp, session_id])
+        conn = ClientConnection(writer, addr, authed_emp, session_id, outbound)
+        clients.add(conn)
+
+        outbound.send(f"SERVER: 로그인 성공 {emp_no} {role}\n".encode("utf-8"))
+        outbound.send(f"SERVER: LOGIN_OK {role}\n".encode("ascii"))
+
+        # 최근 채팅 기록 재전송 (메모리 링, DB 조회 없음)
+        if CHAT_HISTORY_REPLAY:
+            outbound.send(encode_history(chat_history.recent(CHAT_HISTORY_REPLAY)))
 
-        client_socket.sendall(f"SERVER: 로그인 성공 {emp_no} {role}\n".encode("utf-8"))
-        client_socket.sendall(f"SERVER: LOGIN_OK {role}\n".encode("ascii"))
-        
         # 메시지 수신 루프
-        while True:
-            data = client_socket.recv(1024)
-            if not data:
-                break
-            decoded = data.decode("utf-8").strip()
+        async for decoded in lines:
             if not decoded:
                 continue
-            
-            # 세션 활동 업데이트
+
+            # 세션 활동 업데이트 (메모리만 갱신)
             update_session_activity(session_id)
-            
-            save_chat_message(authed_emp, decoded)
-            now = datetime.datetime.now().strftime("%H:%M:%S")
-            final = f"[{now}] {authed_emp} > {decoded}"
-            broadcast(final.encode("utf-8"), client_socket)
 
+            if decoded.startswith("HISTORY "):
+                await _send_history(outbound, decoded)
+                continue
+
+            entry = chat_history.append(authed_emp, decoded)
+            _write_executor.submit(save_chat_message, authed_emp, decoded, entry.created_at, entry.uid)
+            final = f"[{entry.created_at:%H:%M:%S}] {authed_emp} > {decoded}\n"
+            _broadcast_on_loop(final.encode("utf-8"), writer)
+
+    except (ConnectionError, asyncio.IncompleteReadError):
+        pass
+    except FrameTooLong as e:
+        print(f"[TCP] {addr} 메시지 길이 초과로 연결 종료: {e}")
+        outbound.send(f"SERVER: 메시지가 너무 깁니다 (최대 {CHAT_MAX_LINE_BYTES} 바이트)\n".encode("utf-8"))
     except Exception as e:
         print(f"[TCP 오류] {addr} : {e}")
     finally:
-        # 🆕 세션 지속 시간 확인
-        if session_id and login_time_obj:
-            import datetime
-            session_duration = (datetime.datetime.now() - login_time_obj).total_seconds()
-            
-            # 5초 이내에 끊긴 세션은 히스토리에서 삭제
-            if session_duration < 5:
-                try:
-                    from db.manager import engine, text
-                    with engine.begin() as conn:
-                        conn.execute(
-                            text("DELETE FROM login_history WHERE session_id = :sid"),
-                            {"sid": session_id}
-                        )
-                    now = datetime.datetime.now().strftime("%H:%M:%S")
-                    print(f"[{now}] [CLEANUP] 짧은 세션 히스토리 삭제: {authed_emp} (지속시간: {session_duration:.1f}초)")
-                except Exception as e:
-                    print(f"[CLEANUP] 히스토리 삭제 오류: {e}")
-        
-        # 세션 정리
-        if session_id:
-            cleanup_session(session_id)
-        
         # 클라이언트 목록에서 제거
-        with clients_lock:
-            for i, client_info in enumerate(list(clients)):
-                if len(client_info) >= 4 and client_info[3] == session_id:
-                    clients.pop(i)
-                    break
-                elif len(client_info) >= 1 and client_info[0] is client_socket:
-                    clients.pop(i)
-                    break
-        
-        try: 
-            client_socket.close()
-        except: 
+        if conn is not None:
+            clients.remove(conn)
+
+        # 🆕 세션 지속 시간 확인 / 세션 정리 (DB 작업은 executor 에서)
+        if session_id:
+            session_duration = (datetime.datetime.now() - login_time_obj).total_seconds()
+            try:
+                if session_duration < 5:
+                    await _loop.run_in_executor(
+                        _db_executor, _delete_short_session_history, session_id, authed_emp, session_duration
+                    )
+                await _loop.run_in_executor(_db_executor, cleanup_session, session_id)
+            except Exception as e:
+                print(f"[CLEANUP] 세션 정리 오류: {e}")
+
+        # 남은 응답(LOGIN_FAIL 등)을 보낸 뒤 종료 (송신 시간 초과면 writer 태스크가 끊음)
+        outbound.close()
+        try:
+            await outbound.task
+        except Exception:
             pass
+        if not writer.is_closing():
+            writer.close()
         print(f"[TCP 종료] {addr} 연결 종료 (emp_no: {authed_emp})")
 
 
-def start_tcp_server():
-    """TCP 채팅 서버 시작"""
-    print(f"[SRV] TCP 채팅 서버 시작 준비: {TCP_HOST}:{TCP_PORT}")
-    srv = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
-    srv.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
-    srv.bind((TCP_HOST, TCP_PORT))
-    srv.listen()
-    print(f"[SRV] TCP 서버가 {TCP_HOST}:{TCP_PORT} 에서 실행 중입니다.")
-    
-    while True:
-        csock, addr = srv.accept()
-        threading.Thread(target=handle_client, args=(csock, addr), daemon=True).start()
+async def _serve(host, port):
+    global _loop
+    _loop = asyncio.get_running_loop()
+    server = await asyncio.start_server(
+        handle_client, host, port, reuse_address=True, backlog=TCP_LISTEN_BACKLOG
+    )
+    print(f"[SRV] TCP 서버가 {host}:{port} 에서 실행 중입니다.")
+    async with server:
+        await server.serve_forever()
+
+
+def start_tcp_server(host=TCP_HOST, port=TCP_PORT):
+    """TCP 채팅 서버 시작 (이 스레드에서 이벤트 루프 실행)"""
+    print(f"[SRV] TCP 채팅 서버 시작 준비: {host}:{port}")
+    register_session_expiry_listener(disconnect_expired_sessions)
+    chat_history.warm()
+    asyncio.run(_serve(host, port))
+
+
+def get_chat_stats():
+    """채팅 송신 통계 (broadcast fan-out 지연 p50/p99, 느린 클라이언트 종료 수)"""
+    outbounds = [c.outbound for c in clients.snapshot()]
+    queued = [len(o.pending) for o in outbounds]
+    with _chat_stats_lock:
+        samples = sorted(_fanout_samples)
+        stats = dict(_chat_stats)
+
+    def percentile(p):
+        return round(samples[min(len(samples) - 1, int(len(samples) * p))] * 1000, 3) if samples else None
+
+    stats.update({
+        "history": chat_history.stats(),
+        "clients": len(outbounds),
+        "queued_messages": sum(queued),
+        "max_queue_messages": max(queued, default=0),
+        "fanout_p50_ms": percentile(0.5),
+        "fanout_p99_ms": percentile(0.99),
+        "fanout_max_ms": round(samples[-1] * 1000, 3) if samples else None,
+        "fanout_samples": len(samples),
+    })
+    return stats
 
 
 def get_connected_clients_count():
     """연결된 클라이언트 수 반환"""
-    with clients_lock:
-        return len(clients)
\ No newline at end of file
+    return len(clients)
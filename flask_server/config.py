@@ -10,6 +10,33 @@ DB_NAME = "prodmon"
 DB_USER = "Project_2"
 DB_PASS = "moble"
 
+# DB 커넥션 풀 (서버 전체가 이 풀 하나를 공유 → DB 동시성은 여기서 조절)
+DB_POOL_SIZE = 10         # 상시 유지 연결 수
+DB_MAX_OVERFLOW = 10      # 부족할 때 추가로 여는 연결 수
+DB_POOL_TIMEOUT = 5       # 연결을 못 빌리면 이 시간(초) 후 오류
+DB_POOL_RECYCLE = 1800    # 이 시간(초)보다 오래된 연결은 재연결
+DB_CONNECT_TIMEOUT = 5    # 새 연결 시도 제한 시간(초)
+
+# DB 로그 write-behind (채팅/로그인 이력/바코드 검출/온습도 INSERT 를 모아서 저장)
+DB_WRITE_BATCH_SIZE = 100       # 이 건수가 모이면 바로 flush
+DB_WRITE_FLUSH_INTERVAL = 1.0   # 덜 모여도 이 주기(초)마다 flush
+DB_WRITE_QUEUE_MAX = 10000      # 테이블별 대기 최대 건수
+DB_WRITE_BLOCK_TIMEOUT = 0.5    # block 정책: 큐가 가득 차면 최대 이 시간(초) 대기 후 버림
+# 큐가 가득 찼을 때 정책 (block: 잠시 대기 / drop: 바로 버림)
+DB_WRITE_FULL_POLICY = {
+    "chat_message": "block",
+    "login_history": "block",
+    "barcode_detection_log": "drop",
+    "environment_logs": "drop",
+}
+
+# DB 기록 로컬 저널 (DB 장애 중 실패/초과 기록을 보관했다가 복구 후 재전송)
+JOURNAL_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "db_journal")
+JOURNAL_SEGMENT_BYTES = 4 * 1024 * 1024  # segment 파일 회전 크기
+JOURNAL_REPLAY_INTERVAL = 5.0            # 재전송 시도 주기(초)
+JOURNAL_RETRY_AFTER = 5.0                # DB 저장 실패 후 이 시간(초) 동안은 DB 시도 없이 바로 저널로
+JOURNAL_FSYNC = True                     # 저널 추가마다 fsync
+
 # HTTP 서버 설정
 HTTP_HOST = "0.0.0.0"
 HTTP_PORT = 8000
@@ -17,20 +44,92 @@ HTTP_PORT = 8000
 # TCP 채팅 서버 설정
 TCP_HOST = "0.0.0.0"
 TCP_PORT = 5000
+TCP_LISTEN_BACKLOG = 1024  # 재시작 직후 재접속 폭주 대비 accept 대기열
+CHAT_DB_WORKERS = 8        # 채팅 서버의 DB/인증 호출 스레드 수 (이벤트 루프 밖에서 실행)
+# 클라이언트별 송신 대기열 (넘치거나 송신이 이 시간 이상 막히면 그 클라이언트 연결 종료)
+CHAT_OUTBOUND_MAX_MESSAGES = 1000
+CHAT_OUTBOUND_MAX_BYTES = 1024 * 1024
+CHAT_SEND_TIMEOUT = 10.0
+CHAT_FANOUT_SAMPLES = 1000  # fan-out 지연 p50/p99 계산에 쓰는 최근 메시지 수
+# 수신 메시지는 줄바꿈(\n) 단위
+CHAT_READ_BYTES = 64 * 1024       # 한 번에 읽는 최대 크기 (여러 메시지를 한 번에)
+CHAT_MAX_LINE_BYTES = 64 * 1024   # 줄바꿈 없이 이보다 길면 연결 종료
+# 채팅 기록 (메모리 링 + 로그인 직후 재전송 / HISTORY <cursor> <n> 명령으로 이전 기록)
+CHAT_HISTORY_SIZE = 500      # 메모리에 유지하는 최근 메시지 수
+CHAT_HISTORY_REPLAY = 50     # 로그인 직후 보내는 최근 메시지 수 (0 이면 보내지 않음)
+CHAT_HISTORY_PAGE_MAX = 200  # HISTORY 명령 1번에 보내는 최대 메시지 수
 
 # 🆕 세션 관리 설정
 SESSION_TIMEOUT = 3600  # 1시간
-SESSION_CLEANUP_INTERVAL = 300  # 5분마다 정리
+SESSION_CLEANUP_INTERVAL = 300  # 5분마다 전체 점검 (만료는 스케줄러가 deadline 에 처리, 이건 안전망)
+SESSION_EXPIRY_BATCH_WINDOW = 1.0  # 만료 시각이 이 시간(초) 안에 몰린 세션은 한 번에 정리
+SESSION_ACTIVITY_FLUSH_INTERVAL = 15  # 세션 활동 시각을 메모리에 모았다가 이 주기(초)마다 DB 반영
+
+# 로그인 비밀번호 검증 (bcrypt 프로세스 풀)
+AUTH_WORKERS = max(1, min(4, (os.cpu_count() or 2) // 2))  # 검증 프로세스 수
+AUTH_QUEUE_LIMIT = 32   # 실행 중 외에 대기할 수 있는 검증 요청 수 (넘치면 LOGIN_BUSY)
+AUTH_TIMEOUT = 5.0      # 검증 결과를 기다리는 최대 시간(초), 넘으면 LOGIN_BUSY
+AUTH_CACHE_TTL = 60     # 검증 성공한 자격 증명 캐시 시간(초), 0 이면 캐시 안 함
 
 # 영상 스트리밍 설정
 MAX_STREAM_FPS = 30
 NO_SIGNAL_AFTER = 5.0
+UPLOAD_LOG_INTERVAL = 5.0  # 카메라별 프레임 수신 로그 주기 (초)
+
+# 카메라 설정 (카메라 추가 = 항목 추가)
+# - 업로드: /upload_frame/<cam_id>, 스트림: /video_feed/<cam_id>, 최신 프레임: /latest_jpeg/<cam_id>
+# - detection=True 인 카메라만 바코드 검출 수행
+CAMERAS = {
+    "1": {
+        "name": "카메라 1",
+        "label": "바코드 검출",
+        "device": "라즈베리파이 #1",
+        "ip": "192.168.0.87",
+        "purpose": "바코드 검출 + 센서",
+        "detection": True,
+        "roi": (0.0, 0.2, 1.0, 0.8),  # 컨베이어 밴드
+        "decode_scale": 2,
+    },
+    "2": {
+        "name": "카메라 2",
+        "label": "모니터링",
+        "device": "라즈베리파이 #2",
+        "ip": "192.168.0.26",
+        "purpose": "라인 모니터링",
+        "detection": False,
+    },
+}
 
 # 바코드 검출 설정
 BARCODE_DETECTION_INTERVAL = 0.8
 BARCODE_COOLDOWN = 2.5 # 30초 동안 같은 제품 검출 -> 2.5초로 수정
 CONFIDENCE_THRESHOLD = 60.0
 
+# 바코드 디코딩 실행 방식
+# - "thread" : Flask 프로세스 안의 검출 워커 스레드에서 디코딩
+# - "process": multiprocessing 풀에서 디코딩 (프레임은 공유 메모리로 전달, 검출 카메라가 많을 때)
+BARCODE_DETECTION_MODE = "thread"
+BARCODE_DECODE_PROCESSES = max(1, (os.cpu_count() or 2) - 1)
+BARCODE_SHM_SLOT_BYTES = 1024 * 1024  # 공유 메모리 슬롯 크기 (JPEG 1장 최대 크기)
+
+# 바코드 디코딩 영역/해상도 기본값 (카메라별로 CAMERAS 의 roi / decode_scale 로 덮어쓰기)
+# - BARCODE_ROI: 컨베이어 밴드 영역, 프레임 대비 비율 (x1, y1, x2, y2). None 이면 전체 프레임
+# - BARCODE_DECODE_SCALE: 빠른 패스 축소 배율 (1/2/4/8). 빠른 패스에서 후보만 보이고 못 읽으면 원본 해상도로 재시도
+BARCODE_ROI = None
+BARCODE_DECODE_SCALE = 2
+
+# 디코더 캐스케이드 단계 (비용 순서, 처음 성공한 단계에서 종료 / 카메라별 decoder_stages 로 덮어쓰기)
+# 사용 가능: fast, full, enhanced, sharpen, rotated, opencv
+# /stats 의 decoder_cascade 성공률을 보고 효과 없는 단계는 제거
+BARCODE_DECODER_STAGES = ["fast", "full", "enhanced"]
+
+# 모션 게이트 (장면 변화가 없으면 바코드 디코딩 생략)
+MOTION_GATE_ENABLED = True
+MOTION_SIZE_EPSILON = 0.005   # JPEG 크기 변화율이 이보다 작으면 동일 장면
+MOTION_PIXEL_DELTA = 25       # 1/8 축소 프레임에서 '변한 픽셀'로 보는 밝기 차
+MOTION_CHANGED_RATIO = 0.01   # 변한 픽셀 비율이 이 이상이면 디코딩
+MOTION_GATE_REFRESH = 5.0     # 변화가 없어도 이 주기(초)마다 1번은 디코딩
+
 # 바코드 제품 매핑
 BARCODE_PRODUCT_MAP = {
     "8804973304842": "스트로베리향",
@@ -45,6 +144,22 @@ BARCODE_PRODUCT_MAP = {
 SAVE_BARCODE_IMAGES = True
 BASE_DIR = os.path.dirname(os.path.abspath(__file__))
 BARCODE_IMAGE_DIR = os.path.join(BASE_DIR, "barcode_images")
+BARCODE_IMAGE_JPEG_QUALITY = 85
+# 이미지 저장소 (BARCODE_IMAGE_DIR/YYYYMMDD/HH/ 로 샤딩, 한도/기간 초과분은 오래된 것부터 삭제)
+BARCODE_IMAGE_QUOTA_BYTES = 5 * 1024 ** 3  # 전체 용량 한도 (0 이면 제한 없음)
+BARCODE_IMAGE_RETENTION_DAYS = 30          # 보관 기간 (0 이면 제한 없음)
+BARCODE_IMAGE_EVICT_INTERVAL = 300         # 정리 주기(초), 한도를 넘으면 즉시 정리
+BARCODE_THUMB_WIDTH = 320                  # 갤러리 썸네일 가로 크기(px)
+BARCODE_THUMB_JPEG_QUALITY = 70
+
+# 최근 검출 이미지 메모리 캐시 (LRU, 저장 시 바로 적재)
+IMAGE_CACHE_MAX_BYTES = 64 * 1024 * 1024
+IMAGE_CACHE_MAX_ITEM_BYTES = 2 * 1024 * 1024
+# 앞단 웹서버(nginx 등)가 X-Sendfile 을 처리할 때만 True
+IMAGE_X_SENDFILE = False
+
+# 검출 이미지 백그라운드 writer
+IMAGE_WRITER_QUEUE_SIZE = 32       # 저장 대기 이미지 최대 수 (넘치면 이미지만 버리고 DB 기록은 유지)
 
 # ==== 원격 GPIO 제어(라즈베리) ====
 PI_GPIO_HOST = "192.168.0.97"   # 라즈베리 IP
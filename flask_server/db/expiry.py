@@ -0,0 +1,113 @@
+"""
+세션 만료 스케줄러 (deadline 최소 힙)
+- 키별 만료 시각(deadline)을 dict 에 두고, 힙에는 (deadline, 키) 를 넣어 가장 이른 만료 시각에 깨어남
+- 활동 갱신(touch)은 dict 값만 바꿈 (O(1)) → 힙에서 꺼냈을 때 deadline 이 늘어나 있으면 다시 넣음
+- deadline 을 앞당기면 힙에 새로 넣음 (늦은 쪽 항목은 꺼낼 때 버림)
+- 만료 시각이 가까운 키들은 batch_window 안에서 모아 on_expire(keys) 1번으로 처리
+"""
+import datetime
+import heapq
+import threading
+import time
+
+
+class ExpiryScheduler:
+    """키별 deadline 만료 알림 스레드"""
+
+    def __init__(self, on_expire, batch_window=1.0, name="expiry-scheduler"):
+        """on_expire(keys): 만료된 키 목록 처리 → 아직 만료되지 않은 키의 {키: 새 deadline} (없으면 None)"""
+        self.on_expire = on_expire
+        self.batch_window = batch_window
+        self.name = name
+
+        self.lock = threading.Lock()
+        self._wakeup = threading.Condition(self.lock)
+        self._deadlines = {}  # 키 → 실제 deadline (epoch 초)
+        self._heap = []       # (deadline, 키) - deadline 은 실제 값보다 이를 수 있음
+        self._thread = None
+
+        self.expired = 0
+        self.sweeps = 0
+        self.rescheduled = 0
+        self.max_delay = 0.0
+        self.errors = 0
+
+    def start(self):
+        with self.lock:
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name=self.name, daemon=True)
+                self._thread.start()
+        return self
+
+    def schedule(self, key, deadline):
+        """만료 시각 설정/연장/단축"""
+        with self.lock:
+            previous = self._deadlines.get(key)
+            self._deadlines[key] = deadline
+            if previous is None or deadline < previous:
+                heapq.heappush(self._heap, (deadline, key))
+                if self._heap[0][1] == key:
+                    self._wakeup.notify()
+
+    def cancel(self, key):
+        with self.lock:
+            self._deadlines.pop(key, None)
+
+    def _pop_due(self, now):
+        """(lock 안에서) 만료된 키 목록, 없으면 다음 깨어날 때까지 남은 시간"""
+        due = []
+        while self._heap and self._heap[0][0] <= now + (self.batch_window if due else 0):
+            deadline, key = heapq.heappop(self._heap)
+            actual = self._deadlines.get(key)
+            if actual is None:
+                continue  # 취소됨
+            if actual < deadline:
+                continue  # 앞당겨져서 더 이른 항목이 따로 있음
+            if actual > deadline:
+                heapq.heappush(self._heap, (actual, key))  # 그 사이 연장됨
+                continue
+            del self._deadlines[key]
+            due.append((key, actual))
+        wait = self._heap[0][0] - now if self._heap else None
+        return due, wait
+
+    def _run(self):
+        while True:
+            with self.lock:
+                due, wait = self._pop_due(time.time())
+                if not due:
+                    self._wakeup.wait(wait)
+                    continue
+
+            now = time.time()
+            keys = [key for key, _ in due]
+            try:
+                extended = self.on_expire(keys) or {}
+            except Exception as e:
+                # 다음에 다시 시도 (DB 오류 등)
+                print(f"[{datetime.datetime.now():%H:%M:%S}] [EXPIRY] 만료 처리 오류: {e}")
+                extended = {key: now + self.batch_window * 5 for key in keys}
+                with self.lock:
+                    self.errors += 1
+
+            for key, deadline in extended.items():
+                self.schedule(key, deadline)
+
+            with self.lock:
+                self.sweeps += 1
+                self.expired += len(keys) - len(extended)
+                self.rescheduled += len(extended)
+                self.max_delay = max(self.max_delay, max(now - actual for _, actual in due))
+
+    def stats(self):
+        with self.lock:
+            return {
+                "scheduled": len(self._deadlines),
+                "heap_size": len(self._heap),
+                "next_deadline_in": round(self._heap[0][0] - time.time(), 1) if self._heap else None,
+                "sweeps": self.sweeps,
+                "expired": self.expired,
+                "rescheduled": self.rescheduled,
+                "errors": self.errors,
+                "max_delay_sec": round(self.max_delay, 3),
+            }
@@ -0,0 +1,195 @@
+"""
+DB 기록 로컬 저널 (MySQL 장애/지연 중 기록 보관)
+- write-behind flush 가 실패했거나 큐가 가득 찬 기록을 append-only 파일에 한 줄(JSON)씩 추가
+- 파일은 크기 기준으로 segment 회전 (journal-00000001.log, journal-00000002.log ...)
+- 재전송 스레드가 오래된 segment 부터 DB 에 다시 저장하고, 성공하면 segment 삭제
+  → 재전송 SQL 은 자연 키(시각 포함) 또는 기록별 고유 id(chat_message.msg_uid) 기준
+    INSERT ... WHERE NOT EXISTS 라서 여러 번 실행해도 중복 없음
+"""
+import datetime
+import json
+import os
+import threading
+import time
+from config import JOURNAL_DIR, JOURNAL_SEGMENT_BYTES, JOURNAL_REPLAY_INTERVAL, JOURNAL_FSYNC
+
+_SEGMENT_PREFIX = "journal-"
+_SEGMENT_SUFFIX = ".log"
+
+
+def _encode(value):
+    if isinstance(value, datetime.datetime):
+        return {"$dt": value.isoformat()}
+    raise TypeError(f"저널에 저장할 수 없는 값: {type(value)}")
+
+
+def _decode(obj):
+    if "$dt" in obj and len(obj) == 1:
+        return datetime.datetime.fromisoformat(obj["$dt"])
+    return obj
+
+
+class WriteJournal:
+    """segment 회전 append-only 저널 + 재전송 스레드"""
+
+    def __init__(self, replay_fn, directory=JOURNAL_DIR, segment_bytes=JOURNAL_SEGMENT_BYTES,
+                 replay_interval=JOURNAL_REPLAY_INTERVAL, fsync=JOURNAL_FSYNC):
+        """replay_fn(table, rows): rows 를 DB 에 멱등 저장 (실패 시 예외)"""
+        self.replay_fn = replay_fn
+        self.directory = directory
+        self.segment_bytes = segment_bytes
+        self.replay_interval = replay_interval
+        self.fsync = fsync
+
+        self.lock = threading.Lock()
+        self._file = None
+        self._file_seq = 0
+        self._file_size = 0
+        self._segments = {}  # seq → (크기, 첫 기록 시각)
+        self._replay_now = threading.Event()
+        self._thread = None
+
+        self.appended = 0
+        self.replayed = 0
+        self.replay_errors = 0
+        self.last_replay = None
+        self.last_error = None
+
+        os.makedirs(directory, exist_ok=True)
+        self._load_segments()
+
+    # ===== segment =====
+    def _segment_path(self, seq):
+        return os.path.join(self.directory, f"{_SEGMENT_PREFIX}{seq:08d}{_SEGMENT_SUFFIX}")
+
+    def _load_segments(self):
+        """이전 실행에서 남은 segment 확인 (재시작 후에도 재전송)"""
+        for name in os.listdir(self.directory):
+            if not (name.startswith(_SEGMENT_PREFIX) and name.endswith(_SEGMENT_SUFFIX)):
+                continue
+            seq = int(name[len(_SEGMENT_PREFIX):-len(_SEGMENT_SUFFIX)])
+            path = os.path.join(self.directory, name)
+            first_at = None
+            with open(path, encoding="utf-8") as f:
+                line = f.readline()
+                if line.strip():
+                    first_at = json.loads(line).get("at")
+            self._segments[seq] = (os.path.getsize(path), first_at)
+        self._file_seq = max(self._segments, default=0)
+        if self._segments:
+            print(f"[JOURNAL] 재전송 대기 segment {len(self._segments)}개 발견")
+
+    def _rotate(self):
+        """현재 segment 닫고 다음 번호로 (lock 안에서 호출)"""
+        if self._file:
+            self._file.close()
+            self._file = None
+        self._file_seq += 1
+        self._file_size = 0
+
+    # ===== 기록 =====
+    def append(self, table, rows):
+        """기록 추가 (rows: INSERT 파라미터 dict 리스트)"""
+        if not rows:
+            return
+        now = time.time()
+        data = "".join(
+            json.dumps({"t": table, "at": now, "p": row}, default=_encode, ensure_ascii=False) + "\n"
+            for row in rows
+        ).encode("utf-8")
+
+        with self.lock:
+            if self._file is None or self._file_size >= self.segment_bytes:
+                self._rotate()
+                self._file = open(self._segment_path(self._file_seq), "ab")
+            self._file.write(data)
+            self._file.flush()
+            if self.fsync:
+                os.fsync(self._file.fileno())
+            self._file_size += len(data)
+            size, first_at = self._segments.get(self._file_seq, (0, now))
+            self._segments[self._file_seq] = (size + len(data), first_at)
+            self.appended += len(rows)
+
+        self.start()
+
+    def pending(self):
+        with self.lock:
+            return bool(self._segments)
+
+    # ===== 재전송 =====
+    def start(self):
+        if self._thread is None:
+            with self.lock:
+                if self._thread is None:
+                    self._thread = threading.Thread(target=self._run, name="db-journal-replayer", daemon=True)
+                    self._thread.start()
+        return self
+
+    def _run(self):
+        while True:
+            self._replay_now.wait(self.replay_interval)
+            self._replay_now.clear()
+            try:
+                self.replay()
+            except Exception as e:
+                with self.lock:
+                    self.replay_errors += 1
+                    self.last_error = str(e)
+                print(f"[{datetime.datetime.now():%H:%M:%S}] [JOURNAL] 재전송 실패 (다음 주기에 재시도): {e}")
+
+    def replay(self):
+        """오래된 segment 부터 DB 에 재전송 → 재전송 건수 (DB 오류면 예외, segment 는 유지)"""
+        total = 0
+        while True:
+            with self.lock:
+                if not self._segments:
+                    break
+                seq = min(self._segments)
+                if seq == self._file_seq and self._file is not None:
+                    # 쓰는 중인 segment 는 닫고 새 segment 로 넘긴 뒤 재전송
+                    self._rotate()
+            path = self._segment_path(seq)
+
+            by_table = {}
+            with open(path, encoding="utf-8") as f:
+                for line in f:
+                    if not line.strip():
+                        continue
+                    try:
+                        record = json.loads(line, object_hook=_decode)
+                    except ValueError:
+                        continue  # 비정상 종료로 잘린 마지막 줄
+                    by_table.setdefault(record["t"], []).append(record["p"])
+
+            for table, rows in by_table.items():
+                self.replay_fn(table, rows)
+
+            count = sum(len(rows) for rows in by_table.values())
+            os.remove(path)
+            with self.lock:
+                self._segments.pop(seq, None)
+                self.replayed += count
+                self.last_replay = datetime.datetime.now().isoformat()
+            total += count
+            print(f"[{datetime.datetime.now():%H:%M:%S}] [JOURNAL] segment {seq} 재전송 완료: {count}건")
+        return total
+
+    def request_replay(self):
+        """DB 가 복구된 것 같을 때 주기를 기다리지 않고 재전송"""
+        if self.pending():
+            self._replay_now.set()
+
+    def stats(self):
+        with self.lock:
+            oldest = min((first_at for _, first_at in self._segments.values() if first_at), default=None)
+            return {
+                "segments": len(self._segments),
+                "bytes": sum(size for size, _ in self._segments.values()),
+                "appended": self.appended,
+                "replayed": self.replayed,
+                "replay_errors": self.replay_errors,
+                "replay_lag_sec": round(time.time() - oldest, 1) if oldest else 0,
+                "last_replay": self.last_replay,
+                "last_error": self.last_error,
+            }
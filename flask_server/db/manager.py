@@ -1,17 +1,300 @@
 """
 데이터베이스 연결 및 세션 관리
 """
-from sqlalchemy import create_engine, text
-import bcrypt
+from sqlalchemy import create_engine, text, bindparam
+import atexit
 import datetime
+import threading
 import time
 import uuid
 import hashlib
+from collections import deque
+from db.journal import WriteJournal
+from db.pool import MeteredQueuePool
+from db.expiry import ExpiryScheduler
+from db.password import AuthBusy, get_password_verifier
 from config import DB_HOST, DB_PORT, DB_NAME, DB_USER, DB_PASS, SESSION_TIMEOUT, SESSION_CLEANUP_INTERVAL
+from config import SESSION_ACTIVITY_FLUSH_INTERVAL, SESSION_EXPIRY_BATCH_WINDOW
+from config import DB_POOL_SIZE, DB_MAX_OVERFLOW, DB_POOL_TIMEOUT, DB_POOL_RECYCLE, DB_CONNECT_TIMEOUT
+from config import (
+    DB_WRITE_BATCH_SIZE,
+    DB_WRITE_FLUSH_INTERVAL,
+    DB_WRITE_QUEUE_MAX,
+    DB_WRITE_BLOCK_TIMEOUT,
+    DB_WRITE_FULL_POLICY,
+    JOURNAL_RETRY_AFTER,
+)
 
-# DB 엔진 생성
+# DB 엔진 생성 (서버 전체에서 이 엔진/풀 하나만 사용)
 DB_URL = f"mysql+pymysql://{DB_USER}:{DB_PASS}@{DB_HOST}:{DB_PORT}/{DB_NAME}?charset=utf8mb4"
-engine = create_engine(DB_URL, pool_pre_ping=True, pool_recycle=1800, echo=False)
+engine = create_engine(
+    DB_URL,
+    poolclass=MeteredQueuePool,
+    pool_size=DB_POOL_SIZE,
+    max_overflow=DB_MAX_OVERFLOW,
+    pool_timeout=DB_POOL_TIMEOUT,
+    pool_recycle=DB_POOL_RECYCLE,
+    pool_pre_ping=True,
+    connect_args={"connect_timeout": DB_CONNECT_TIMEOUT},
+    echo=False,
+)
+
+
+def get_pool_stats():
+    """커넥션 풀 체크아웃 지연/포화 지표"""
+    return engine.pool.metrics()
+
+
+# ==========================================
+# 로그 INSERT write-behind
+# - 호출 스레드는 큐에 넣고 바로 반환, 테이블별 flush 스레드가 executemany 로 모아서 저장
+# - 시각 컬럼은 큐에 넣는 시점 값을 사용 (flush 지연과 무관, DB 와 같은 초 단위)
+# - 큐가 가득 차면 정책에 따라 잠시 대기(block) 후, 또는 바로(drop) 로컬 저널로
+# - flush 실패분도 저널로 → 재전송 스레드가 DB 복구 후 멱등 INSERT 로 다시 저장
+# ==========================================
+def _now():
+    """기록 시각 (TIMESTAMP 컬럼과 같은 초 단위, 재전송 시 자연 키로 사용)"""
+    return datetime.datetime.now().replace(microsecond=0)
+
+
+class WriteBehindQueue:
+    """테이블 1개의 INSERT 대기열 + flush 스레드"""
+
+    def __init__(self, name, sql, replay_sql, batch_size=DB_WRITE_BATCH_SIZE, flush_interval=DB_WRITE_FLUSH_INTERVAL,
+                 max_pending=DB_WRITE_QUEUE_MAX, policy="drop", block_timeout=DB_WRITE_BLOCK_TIMEOUT):
+        self.name = name
+        self.sql = text(sql)
+        self.replay_sql = text(replay_sql)
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.max_pending = max_pending
+        self.policy = policy
+        self.block_timeout = block_timeout
+
+        self.lock = threading.Lock()
+        self._not_empty = threading.Condition(self.lock)
+        self._not_full = threading.Condition(self.lock)
+        self._pending = deque()
+        self._flush_lock = threading.Lock()  # flush 스레드와 동기 flush 가 겹치지 않도록
+        self._thread = None
+
+        self.submitted = 0
+        self.written = 0
+        self.dropped = 0
+        self.blocked = 0
+        self.failed = 0
+        self.journaled = 0
+        self.flushes = 0
+        self.last_flush_ms = 0.0
+        self.max_flush_ms = 0.0
+
+    def submit(self, params):
+        """1건 추가 (가득 차면 정책대로 대기 후 저널로) → 기록이 보존됐는지 여부"""
+        with self.lock:
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name=f"db-writer-{self.name}", daemon=True)
+                self._thread.start()
+
+            self.submitted += 1
+            full = len(self._pending) >= self.max_pending
+            if full and self.policy == "block":
+                self.blocked += 1
+                full = not self._not_full.wait_for(lambda: len(self._pending) < self.max_pending, self.block_timeout)
+
+            if not full:
+                self._pending.append(params)
+                if len(self._pending) >= self.batch_size:
+                    self._not_empty.notify()
+                return True
+
+        return self._spill([params])
+
+    def _spill(self, rows):
+        """저널에 기록 (디스크 오류면 버림) → 보존 여부"""
+        try:
+            journal.append(self.name, rows)
+        except Exception as e:
+            print(f"[DB] {self.name} 저널 기록 실패, {len(rows)}건 유실: {e}")
+            with self.lock:
+                self.dropped += len(rows)
+            return False
+        with self.lock:
+            self.journaled += len(rows)
+        return True
+
+    def _run(self):
+        while True:
+            with self.lock:
+                self._not_empty.wait_for(lambda: len(self._pending) >= self.batch_size, self.flush_interval)
+            try:
+                self.flush()
+            except Exception as e:
+                print(f"[DB] write-behind {self.name} flush 오류: {e}")
+
+    def flush(self):
+        """대기 중인 건을 batch 단위 executemany 로 저장 (동기, 실패분은 저널) → 처리 건수"""
+        total = 0
+        with self._flush_lock:
+            while True:
+                with self.lock:
+                    if not self._pending:
+                        break
+                    batch = [self._pending.popleft() for _ in range(min(self.batch_size, len(self._pending)))]
+                    self._not_full.notify_all()
+
+                if _db_unavailable():
+                    # 직전에 실패했으면 DB 를 기다리지 않고 바로 저널로 (재전송 스레드가 복구 확인)
+                    self._spill(batch)
+                    total += len(batch)
+                    continue
+
+                started = time.time()
+                try:
+                    with engine.begin() as conn:
+                        conn.execute(self.sql, batch)
+                    ok = True
+                except Exception as e:
+                    ok = False
+                    _mark_db_unavailable()
+                    print(f"[DB] write-behind {self.name} 저장 실패 ({len(batch)}건) → 저널: {e}")
+                    self._spill(batch)
+                elapsed_ms = (time.time() - started) * 1000
+
+                with self.lock:
+                    self.flushes += 1
+                    self.last_flush_ms = elapsed_ms
+                    self.max_flush_ms = max(self.max_flush_ms, elapsed_ms)
+                    if ok:
+                        self.written += len(batch)
+                    else:
+                        self.failed += len(batch)
+                total += len(batch)
+        return total
+
+    def stats(self):
+        with self.lock:
+            return {
+                "pending": len(self._pending),
+                "max_pending": self.max_pending,
+                "policy": self.policy,
+                "submitted": self.submitted,
+                "written": self.written,
+                "dropped": self.dropped,
+                "blocked": self.blocked,
+                "failed": self.failed,
+                "journaled": self.journaled,
+                "flushes": self.flushes,
+                "rows_per_flush": round(self.written / self.flushes, 1) if self.flushes else 0,
+                "last_flush_ms": round(self.last_flush_ms, 2),
+                "max_flush_ms": round(self.max_flush_ms, 2),
+            }
+
+
+# 테이블 이름 → WriteBehindQueue
+write_behind_queues = {}
+
+
+# DB 장애 표시 (이 시각까지는 flush 가 DB 를 시도하지 않고 저널로)
+_db_down_until = 0.0
+
+
+def _db_unavailable():
+    return time.time() < _db_down_until
+
+
+def _mark_db_unavailable():
+    global _db_down_until
+    _db_down_until = time.time() + JOURNAL_RETRY_AFTER
+
+
+def _replay_journal_rows(table, rows):
+    """저널 재전송: 자연 키 / 고유 id 로 이미 있는 행은 건너뜀 (실패 시 예외 → segment 유지)"""
+    global _db_down_until
+    queue = write_behind_queues[table]
+    with engine.begin() as conn:
+        conn.execute(queue.replay_sql, rows)
+    _db_down_until = 0.0
+
+
+journal = WriteJournal(_replay_journal_rows)
+
+
+def _register_write_behind(name, sql, replay_sql):
+    queue = WriteBehindQueue(name, sql, replay_sql, policy=DB_WRITE_FULL_POLICY.get(name, "drop"))
+    write_behind_queues[name] = queue
+    return queue
+
+
+_chat_writes = _register_write_behind("chat_message", """
+    INSERT INTO chat_message(msg_uid, sender_emp_no, content, created_at)
+    VALUES (:uid, :e, :c, :t)
+""", """
+    INSERT INTO chat_message(msg_uid, sender_emp_no, content, created_at)
+    SELECT :uid, :e, :c, :t FROM DUAL
+    WHERE NOT EXISTS (
+        SELECT 1 FROM chat_message WHERE msg_uid = :uid
+    )
+""")
+_login_history_writes = _register_write_behind("login_history", """
+    INSERT INTO login_history(emp_no, session_id, session_type, client_ip, login_status, fail_reason, user_agent, login_time)
+    VALUES (:e, :sid, :type, :ip, :status, :reason, :agent, :t)
+""", """
+    INSERT INTO login_history(emp_no, session_id, session_type, client_ip, login_status, fail_reason, user_agent, login_time)
+    SELECT :e, :sid, :type, :ip, :status, :reason, :agent, :t FROM DUAL
+    WHERE NOT EXISTS (
+        SELECT 1 FROM login_history
+        WHERE login_time = :t AND emp_no = :e AND login_status = :status AND session_id <=> :sid
+    )
+""")
+_barcode_writes = _register_write_behind("barcode_detection_log", """
+    INSERT INTO barcode_detection_log
+    (barcode, product_name, confidence, image_path, image_filename, detected_at,
+     bbox_x1, bbox_y1, bbox_x2, bbox_y2)
+    VALUES (:barcode, :product, :conf, :path, :filename, :detected_at, :x1, :y1, :x2, :y2)
+""", """
+    INSERT INTO barcode_detection_log
+    (barcode, product_name, confidence, image_path, image_filename, detected_at,
+     bbox_x1, bbox_y1, bbox_x2, bbox_y2)
+    SELECT :barcode, :product, :conf, :path, :filename, :detected_at, :x1, :y1, :x2, :y2 FROM DUAL
+    WHERE NOT EXISTS (
+        SELECT 1 FROM barcode_detection_log WHERE detected_at = :detected_at AND barcode = :barcode
+    )
+""")
+_environment_writes = _register_write_behind("environment_logs", """
+    INSERT INTO environment_logs(temperature, humidity, recorded_at, log_type)
+    VALUES (:temp, :hum, :t, :type)
+""", """
+    INSERT INTO environment_logs(temperature, humidity, recorded_at, log_type)
+    SELECT :temp, :hum, :t, :type FROM DUAL
+    WHERE NOT EXISTS (
+        SELECT 1 FROM environment_logs WHERE recorded_at = :t AND log_type = :type
+    )
+""")
+
+
+def flush_write_behind(name=None):
+    """대기 중인 로그 INSERT 를 즉시 저장 (name 없으면 전체) - 조회/수정 전 일관성 확보, 종료 시 사용"""
+    queues = [write_behind_queues[name]] if name else list(write_behind_queues.values())
+    return sum(queue.flush() for queue in queues)
+
+
+def get_write_behind_stats():
+    return {name: queue.stats() for name, queue in write_behind_queues.items()}
+
+
+def get_journal_stats():
+    stats = journal.stats()
+    stats["db_unavailable"] = _db_unavailable()
+    return stats
+
+
+def start_journal_replayer():
+    """저널 재전송 스레드 시작 (이전 실행에서 남은 기록도 재전송)"""
+    journal.start()
+    journal.request_replay()
+
+
+atexit.register(flush_write_behind)
 
 
 def init_session_table():
@@ -56,6 +339,16 @@ def init_session_table():
                 print("[DB] user_session 테이블에 session_type 컬럼 추가")
             except:
                 pass
+
+            # 로그인 시 사원별 세션 정리용 인덱스 (없으면)
+            try:
+                conn.execute(text("""
+                    CREATE INDEX idx_emp_login
+                    ON user_session (emp_no, session_type, is_active, is_temporary, login_time)
+                """))
+                print("[DB] user_session 테이블에 idx_emp_login 인덱스 추가")
+            except:
+                pass
             
             # 로그인 히스토리 테이블 (session_type 포함)
             conn.execute(text("""
@@ -103,145 +396,162 @@ def init_session_table():
                     bbox_x2 INT,
                     bbox_y2 INT,
                     INDEX idx_barcode (barcode),
-                    INDEX idx_detected_at (detected_at)
+                    INDEX idx_detected_at (detected_at),
+                    INDEX idx_image_filename (image_filename)
                 ) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4
             """))
-            
+
+            # 이미지 정리/이동 시 파일 이름으로 행을 찾는 인덱스 (없으면)
+            try:
+                conn.execute(text("CREATE INDEX idx_image_filename ON barcode_detection_log (image_filename)"))
+                print("[DB] barcode_detection_log 테이블에 idx_image_filename 인덱스 추가")
+            except:
+                pass
+
+            # 채팅 기록 페이지 조회용 인덱스 (created_at, id 기준 keyset)
+            try:
+                conn.execute(text("CREATE INDEX idx_created_id ON chat_message (created_at, id)"))
+                print("[DB] chat_message 테이블에 idx_created_id 인덱스 추가")
+            except:
+                pass
+
+            # 메시지별 고유 id (저널 재전송 시 같은 초에 보낸 같은 내용 메시지도 구분)
+            try:
+                conn.execute(text("ALTER TABLE chat_message ADD COLUMN msg_uid CHAR(32) NULL"))
+                print("[DB] chat_message 테이블에 msg_uid 컬럼 추가")
+            except:
+                pass
+            try:
+                conn.execute(text("CREATE UNIQUE INDEX uq_msg_uid ON chat_message (msg_uid)"))
+                print("[DB] chat_message 테이블에 uq_msg_uid 인덱스 추가")
+            except:
+                pass
+            # 컬럼 추가 전 메시지에도 msg_uid 채움 (채팅 기록 cursor 로 사용)
+            try:
+                result = conn.execute(text(
+                    "UPDATE chat_message SET msg_uid = REPLACE(UUID(), '-', '') WHERE msg_uid IS NULL"
+                ))
+                if result.rowcount:
+                    print(f"[DB] chat_message 기존 메시지 {result.rowcount}개에 msg_uid 채움")
+            except:
+                pass
+
         print("[DB] 세션 테이블 및 로그인 히스토리 테이블 초기화 완료")
     except Exception as e:
         print(f"[DB] 테이블 초기화 오류: {e}")
 
 
+# verify_user 세션 정리/생성 SQL (사원번호 + 세션 종류 기준, idx_emp_login 사용)
+_LOGIN_SESSION_FILTER = "us.emp_no = :e AND us.session_type = :type AND us.is_active = 1 AND us.is_temporary = 0"
+
+_LOGIN_DELETE_TEMPORARY = text("""
+    DELETE FROM user_session
+    WHERE emp_no = :e AND session_type = :type AND is_temporary = 1
+""")
+_LOGIN_CLOSE_STALE_HISTORY = text(f"""
+    UPDATE login_history lh
+    JOIN user_session us ON us.session_id = lh.session_id
+    SET lh.logout_time = NOW(),
+        lh.session_duration = TIMESTAMPDIFF(SECOND, us.login_time, NOW()),
+        lh.fail_reason = '중복_로그인'
+    WHERE {_LOGIN_SESSION_FILTER}
+    AND us.login_time <= NOW() - INTERVAL 6 SECOND
+    AND lh.logout_time IS NULL
+""")
+_LOGIN_DEACTIVATE_STALE = text(f"""
+    UPDATE user_session us SET us.is_active = 0
+    WHERE {_LOGIN_SESSION_FILTER}
+    AND us.login_time <= NOW() - INTERVAL 6 SECOND
+""")
+_LOGIN_DELETE_RECENT_HISTORY = text(f"""
+    DELETE lh FROM login_history lh
+    JOIN user_session us ON us.session_id = lh.session_id
+    WHERE {_LOGIN_SESSION_FILTER}
+    AND us.login_time > NOW() - INTERVAL 2 SECOND
+""")
+_LOGIN_DEMOTE_RECENT = text(f"""
+    UPDATE user_session us SET us.is_temporary = 1
+    WHERE {_LOGIN_SESSION_FILTER}
+    AND us.login_time > NOW() - INTERVAL 2 SECOND
+""")
+_LOGIN_INSERT_SESSION = text("""
+    INSERT INTO user_session(emp_no, session_id, session_type, client_ip, is_temporary)
+    VALUES (:e, :s, :type, :ip, 0)
+""")
+_LOGIN_INSERT_HISTORY = text("""
+    INSERT INTO login_history(emp_no, session_id, session_type, client_ip, login_status, login_time)
+    VALUES (:e, :s, :type, :ip, 'SUCCESS', NOW())
+""")
+
+
 def verify_user(emp_no: str, password: str, client_ip: str, session_type: str = 'TCP'):
-    """사용자 인증 및 세션 생성"""
+    """
+    사용자 인증 및 세션 생성
+    - 비밀번호 검증(bcrypt)은 트랜잭션 밖 프로세스 풀에서 (검증 중에는 DB 연결을 잡지 않음)
+    - 검증 대기열이 가득 차면 AuthBusy 를 그대로 올림 (호출 측에서 LOGIN_BUSY 응답)
+    """
     try:
-        with engine.begin() as conn:
-            # 1. 사용자 인증
+        # 1. 사용자 인증
+        with engine.connect() as conn:
             row = conn.execute(
                 text("SELECT password_hash, is_active, role FROM user_account WHERE emp_no = :e LIMIT 1"),
                 {"e": emp_no}
             ).first()
 
-            if not row:
-                save_login_history(emp_no, client_ip, 'FAIL', '존재하지_않는_계정', None, None, session_type, record_anyway=True)
-                return False, None, None
+        if not row:
+            save_login_history(emp_no, client_ip, 'FAIL', '존재하지_않는_계정', None, None, session_type)
+            return False, None, None
 
-            pwd_hash, is_active, role = row[0], row[1], row[2]
-            
-            if isinstance(pwd_hash, (bytes, bytearray, memoryview)):
-                pwd_hash = bytes(pwd_hash).decode("utf-8", errors="ignore")
+        pwd_hash, is_active, role = row[0], row[1], row[2]
+
+        if isinstance(pwd_hash, (bytes, bytearray, memoryview)):
+            pwd_hash = bytes(pwd_hash).decode("utf-8", errors="ignore")
 
-            if not is_active:
-                save_login_history(emp_no, client_ip, 'FAIL', '비활성화된_계정', None, None, session_type, record_anyway=True)
-                return False, None, None
+        if not is_active:
+            save_login_history(emp_no, client_ip, 'FAIL', '비활성화된_계정', None, None, session_type)
+            return False, None, None
 
-            if not bcrypt.checkpw(password.encode("utf-8"), pwd_hash.encode("utf-8")):
-                save_login_history(emp_no, client_ip, 'FAIL', '비밀번호_불일치', None, None, session_type, record_anyway=True)
-                return False, None, None
+        if not get_password_verifier().verify(emp_no, password, pwd_hash):
+            save_login_history(emp_no, client_ip, 'FAIL', '비밀번호_불일치', None, None, session_type)
+            return False, None, None
 
+        new_session_id = hashlib.sha256(
+            f"{emp_no}_{session_type}_{uuid.uuid4()}_{datetime.datetime.now().isoformat()}".encode()
+        ).hexdigest()
+        params = {"e": emp_no, "type": session_type, "s": new_session_id, "ip": client_ip}
+
+        # 세션 정리/생성: 이전 세션 수와 무관하게 고정 7문장 (행 단위 루프 없음)
+        # - TIMESTAMPDIFF(login_time, NOW()) > 5  ⇔ login_time <= NOW() - INTERVAL 6 SECOND
+        # - TIMESTAMPDIFF(login_time, NOW()) <= 1 ⇔ login_time >  NOW() - INTERVAL 2 SECOND
+        with engine.begin() as conn:
             # 🆕 2. 같은 사원번호의 임시 세션 모두 삭제
-            conn.execute(
-                text("""
-                    DELETE FROM user_session 
-                    WHERE emp_no = :e 
-                    AND session_type = :type 
-                    AND is_temporary = 1
-                """),
-                {"e": emp_no, "type": session_type}
-            )
+            conn.execute(_LOGIN_DELETE_TEMPORARY, params)
 
-            # 3. 5초 이상 된 정규 세션 정리
-            existing = conn.execute(
-                text("""
-                    SELECT session_id, login_time 
-                    FROM user_session 
-                    WHERE emp_no = :e 
-                    AND session_type = :type 
-                    AND is_active = 1
-                    AND is_temporary = 0
-                    AND TIMESTAMPDIFF(SECOND, login_time, NOW()) > 5
-                """),
-                {"e": emp_no, "type": session_type}
-            ).fetchall()
+            # 3. 5초 이상 된 정규 세션 정리 (이력에 중복 로그인으로 logout 기록 → 비활성화)
+            conn.execute(_LOGIN_CLOSE_STALE_HISTORY, params)
+            conn.execute(_LOGIN_DEACTIVATE_STALE, params)
 
-            for old_session in existing:
-                old_sid, login_time = old_session[0], old_session[1]
-                logout_time = datetime.datetime.now()
-                duration = int((logout_time - login_time).total_seconds())
-                
-                conn.execute(
-                    text("""
-                        UPDATE login_history 
-                        SET logout_time = :logout, 
-                            session_duration = :duration,
-                            fail_reason = '중복_로그인'
-                        WHERE session_id = :sid AND logout_time IS NULL
-                    """),
-                    {"logout": logout_time, "duration": duration, "sid": old_sid}
-                )
-            
-            conn.execute(
-                text("""
-                    UPDATE user_session 
-                    SET is_active = 0 
-                    WHERE emp_no = :e 
-                    AND session_type = :type 
-                    AND is_active = 1
-                    AND is_temporary = 0
-                    AND TIMESTAMPDIFF(SECOND, login_time, NOW()) > 5
-                """),
-                {"e": emp_no, "type": session_type}
-            )
+            # 🆕 4. 1초 이내의 최근 세션을 임시로 변경 (히스토리 삭제)
+            conn.execute(_LOGIN_DELETE_RECENT_HISTORY, params)
+            demoted = conn.execute(_LOGIN_DEMOTE_RECENT, params).rowcount
 
-            # 🆕 4. 1초 이내의 최근 세션을 임시로 변경
-            recent_sessions = conn.execute(
-                text("""
-                    SELECT session_id 
-                    FROM user_session 
-                    WHERE emp_no = :e 
-                    AND session_type = :type 
-                    AND is_active = 1 
-                    AND is_temporary = 0
-                    AND TIMESTAMPDIFF(SECOND, login_time, NOW()) <= 1
-                    ORDER BY login_time DESC
-                """),
-                {"e": emp_no, "type": session_type}
-            ).fetchall()
+            # 5. 새 세션 생성 (항상 정규 세션) + 로그인 기록
+            conn.execute(_LOGIN_INSERT_SESSION, params)
+            conn.execute(_LOGIN_INSERT_HISTORY, params)
 
-            # 모든 최근 세션을 임시로 변경
-            for (old_sid,) in recent_sessions:
-                conn.execute(
-                    text("UPDATE user_session SET is_temporary = 1 WHERE session_id = :sid"),
-                    {"sid": old_sid}
-                )
-                
-                # 히스토리에서 삭제
-                conn.execute(
-                    text("DELETE FROM login_history WHERE session_id = :sid"),
-                    {"sid": old_sid}
-                )
-                
-                now = datetime.datetime.now().strftime("%H:%M:%S.%f")[:-3]
-                print(f"[{now}] [LOGIN] 이전 세션을 임시로 변경: {old_sid[:16]}... (히스토리 삭제)")
+        if demoted:
+            now = datetime.datetime.now().strftime("%H:%M:%S.%f")[:-3]
+            print(f"[{now}] [LOGIN] 이전 세션 {demoted}개를 임시로 변경 (히스토리 삭제)")
+        now = datetime.datetime.now().strftime("%H:%M:%S")
+        print(f"[{now}] [LOGIN_HISTORY] ✅ SUCCESS ({session_type}): {emp_no} from {client_ip}")
 
-            # 5. 새 세션 생성 (항상 정규 세션)
-            new_session_id = hashlib.sha256(
-                f"{emp_no}_{session_type}_{uuid.uuid4()}_{datetime.datetime.now().isoformat()}".encode()
-            ).hexdigest()
-            
-            conn.execute(
-                text("""
-                    INSERT INTO user_session(emp_no, session_id, session_type, client_ip, is_temporary) 
-                    VALUES (:e, :s, :type, :ip, 0)
-                """),
-                {"e": emp_no, "s": new_session_id, "type": session_type, "ip": client_ip}
-            )
+        # 타임아웃 만료 예약
+        _session_expiry.schedule(new_session_id, time.time() + SESSION_TIMEOUT)
 
-            # 로그인 기록
-            save_login_history(emp_no, client_ip, 'SUCCESS', None, None, new_session_id, session_type, record_anyway=True)
+        return True, (role or "STAFF").upper(), new_session_id
 
-            return True, (role or "STAFF").upper(), new_session_id
-            
+    except AuthBusy:
+        raise
     except Exception as e:
         print(f"[AUTH] 인증 오류: {e}")
         import traceback
@@ -254,6 +564,10 @@ def cleanup_session(session_id: str):
     if not session_id:
         return
     
+    with _session_activity_lock:
+        _session_activity.pop(session_id, None)
+    _session_expiry.cancel(session_id)
+
     try:
         with engine.begin() as conn:
             # 🆕 임시 세션 확인
@@ -289,139 +603,308 @@ def cleanup_session(session_id: str):
         print(f"[SESSION] 정리 오류: {e}")
 
 
+# 세션 활동 시각 (session_id → 마지막 활동 시각), 주기적으로 UPDATE 1번에 모아서 반영
+_session_activity = {}
+_session_activity_lock = threading.Lock()
+_session_activity_thread = None
+_session_activity_stats = {"touches": 0, "flushes": 0, "rows": 0, "errors": 0, "last_flush_ms": 0.0}
+
+
 def update_session_activity(session_id: str):
-    """세션 활동 시간 업데이트"""
+    """세션 활동 시간 업데이트 (메모리에만 기록, DB 는 flush_session_activity 에서)"""
+    global _session_activity_thread
     if not session_id:
         return
-    
+
+    # 만료 시각 연장 (dict 값만 갱신)
+    _session_expiry.schedule(session_id, time.time() + SESSION_TIMEOUT)
+
+    with _session_activity_lock:
+        _session_activity[session_id] = datetime.datetime.now()
+        _session_activity_stats["touches"] += 1
+        if _session_activity_thread is None:
+            _session_activity_thread = threading.Thread(
+                target=_session_activity_worker, name="session-activity-flush", daemon=True
+            )
+            _session_activity_thread.start()
+
+
+def _session_activity_worker():
+    while True:
+        time.sleep(SESSION_ACTIVITY_FLUSH_INTERVAL)
+        flush_session_activity()
+
+
+def flush_session_activity(chunk_size=500):
+    """모아 둔 활동 시각을 CASE UPDATE 로 반영 → 반영 대상 세션 수"""
+    with _session_activity_lock:
+        if not _session_activity:
+            return 0
+        pending = list(_session_activity.items())
+        _session_activity.clear()
+
+    started = time.time()
     try:
         with engine.begin() as conn:
-            conn.execute(
+            for i in range(0, len(pending), chunk_size):
+                chunk = pending[i:i + chunk_size]
+                params = {}
+                cases = []
+                for n, (session_id, touched_at) in enumerate(chunk):
+                    params[f"s{n}"] = session_id
+                    params[f"t{n}"] = touched_at
+                    cases.append(f"WHEN :s{n} THEN :t{n}")
+                conn.execute(
+                    text(f"""
+                        UPDATE user_session
+                        SET last_activity = GREATEST(last_activity, CASE session_id {' '.join(cases)} END)
+                        WHERE is_active = 1
+                        AND session_id IN ({', '.join(f':s{n}' for n in range(len(chunk)))})
+                    """),
+                    params
+                )
+    except Exception as e:
+        # 실패하면 다음 주기에 다시 (그 사이 새 활동이 있으면 더 최근 값 유지)
+        with _session_activity_lock:
+            for session_id, touched_at in pending:
+                if session_id not in _session_activity or _session_activity[session_id] < touched_at:
+                    _session_activity[session_id] = touched_at
+            _session_activity_stats["errors"] += 1
+        print(f"[SESSION] 활동 시각 반영 오류: {e}")
+        return 0
+
+    with _session_activity_lock:
+        _session_activity_stats["flushes"] += 1
+        _session_activity_stats["rows"] += len(pending)
+        _session_activity_stats["last_flush_ms"] = round((time.time() - started) * 1000, 2)
+    return len(pending)
+
+
+def get_session_activity_stats():
+    with _session_activity_lock:
+        stats = dict(_session_activity_stats)
+        stats["pending"] = len(_session_activity)
+    return stats
+
+
+def _close_sessions(conn, session_ids, reason):
+    """정규 세션 종료 (집합 UPDATE 2번: 로그인 이력 logout 기록 → 세션 비활성화)"""
+    params = {"ids": list(session_ids), "reason": reason}
+    conn.execute(
+        text("""
+            UPDATE login_history lh
+            JOIN user_session us ON us.session_id = lh.session_id
+            SET lh.logout_time = NOW(),
+                lh.session_duration = TIMESTAMPDIFF(SECOND, us.login_time, NOW()),
+                lh.fail_reason = :reason
+            WHERE us.session_id IN :ids
+            AND lh.logout_time IS NULL
+        """).bindparams(bindparam("ids", expanding=True)),
+        params
+    )
+    conn.execute(
+        text("""
+            UPDATE user_session SET is_active = 0
+            WHERE session_id IN :ids AND is_active = 1
+        """).bindparams(bindparam("ids", expanding=True)),
+        params
+    )
+
+
+def _notify_session_expiry(session_ids):
+    for listener in list(_session_expiry_listeners):
+        try:
+            listener(session_ids)
+        except Exception as e:
+            print(f"[SESSION] 만료 알림 오류: {e}")
+
+
+def _expire_sessions(session_ids):
+    """
+    만료 스케줄러 콜백: deadline 이 지난 세션 정리
+    DB 의 last_activity 로 다시 확인해서 아직 활동 중이면 새 deadline 반환
+    """
+    flush_session_activity()
+
+    with engine.begin() as conn:
+        rows = conn.execute(
+            text("""
+                SELECT session_id, last_activity, last_activity < NOW() - INTERVAL :timeout SECOND
+                FROM user_session
+                WHERE session_id IN :ids AND is_active = 1 AND is_temporary = 0
+            """).bindparams(bindparam("ids", expanding=True)),
+            {"ids": list(session_ids), "timeout": SESSION_TIMEOUT}
+        ).fetchall()
+
+        expired = [row[0] for row in rows if row[2]]
+        extended = {row[0]: row[1].timestamp() + SESSION_TIMEOUT for row in rows if not row[2]}
+        if expired:
+            _close_sessions(conn, expired, '타임아웃')
+
+    if expired:
+        now = datetime.datetime.now().strftime("%H:%M:%S")
+        print(f"[{now}] [SESSION_EXPIRY] 만료된 세션 {len(expired)}개 정리")
+        _notify_session_expiry(expired)
+    return extended
+
+
+# 세션 만료 스케줄러 (session_id → 마지막 활동 + SESSION_TIMEOUT)
+_session_expiry = ExpiryScheduler(_expire_sessions, SESSION_EXPIRY_BATCH_WINDOW, name="session-expiry")
+_session_expiry_listeners = []
+
+
+def register_session_expiry_listener(listener):
+    """세션 만료 시 호출할 함수 등록 (listener(session_ids), 채팅 서버의 연결 종료 등)"""
+    _session_expiry_listeners.append(listener)
+
+
+def start_session_expiry():
+    """활성 정규 세션을 만료 스케줄러에 등록하고 시작"""
+    try:
+        with engine.connect() as conn:
+            rows = conn.execute(
                 text("""
-                    UPDATE user_session 
-                    SET last_activity = CURRENT_TIMESTAMP 
-                    WHERE session_id = :s AND is_active = 1
-                """),
-                {"s": session_id}
-            )
-    except Exception:
-        pass
+                    SELECT session_id, last_activity FROM user_session
+                    WHERE is_active = 1 AND is_temporary = 0
+                """)
+            ).fetchall()
+        for session_id, last_activity in rows:
+            _session_expiry.schedule(session_id, last_activity.timestamp() + SESSION_TIMEOUT)
+        print(f"[SESSION] 만료 스케줄러 시작: 활성 세션 {len(rows)}개")
+    except Exception as e:
+        print(f"[SESSION] 활성 세션 로드 오류: {e}")
+    _session_expiry.start()
+
+
+def get_session_expiry_stats():
+    return _session_expiry.stats()
 
 
 def session_cleanup_worker():
-    """세션 정리 워커 (백그라운드)"""
+    """
+    세션 정리 워커 (백그라운드 안전망)
+    - 타임아웃 만료는 _session_expiry 가 deadline 에 처리
+    - 여기서는 오래된 임시 세션 삭제 + 스케줄러가 모르는 만료 세션(다른 프로세스 생성 등) 정리
+    """
     while True:
         time.sleep(SESSION_CLEANUP_INTERVAL)
-        
+
         try:
+            # 메모리에만 있는 최근 활동을 먼저 반영 (활동 중인 세션이 타임아웃되지 않도록)
+            flush_session_activity()
             with engine.begin() as conn:
                 # 🆕 임시 세션 중 5초 이상 된 것은 즉시 삭제 (히스토리 기록 안 함)
                 conn.execute(
                     text("""
-                        DELETE FROM user_session 
-                        WHERE is_temporary = 1 
-                        AND TIMESTAMPDIFF(SECOND, login_time, NOW()) > 5
+                        DELETE FROM user_session
+                        WHERE is_temporary = 1
+                        AND login_time < NOW() - INTERVAL 5 SECOND
                     """)
                 )
-                
-                # 만료된 정규 세션 조회
-                expired = conn.execute(
+
+                # 만료된 정규 세션 (idx_last_activity 사용)
+                expired = [row[0] for row in conn.execute(
                     text("""
-                        SELECT session_id, login_time 
-                        FROM user_session 
-                        WHERE is_active = 1 
+                        SELECT session_id
+                        FROM user_session
+                        WHERE last_activity < NOW() - INTERVAL :timeout SECOND
+                        AND is_active = 1
                         AND is_temporary = 0
-                        AND TIMESTAMPDIFF(SECOND, last_activity, NOW()) > :timeout
                     """),
                     {"timeout": SESSION_TIMEOUT}
-                ).fetchall()
-                
-                for session_id, login_time in expired:
-                    logout_time = datetime.datetime.now()
-                    duration = int((logout_time - login_time).total_seconds())
-                    
-                    conn.execute(
-                        text("""
-                            UPDATE login_history 
-                            SET logout_time = :logout, 
-                                session_duration = :duration,
-                                fail_reason = '타임아웃'
-                            WHERE session_id = :sid AND logout_time IS NULL
-                        """),
-                        {"logout": logout_time, "duration": duration, "sid": session_id}
-                    )
-                    
-                    conn.execute(
-                        text("UPDATE user_session SET is_active = 0 WHERE session_id = :s"),
-                        {"s": session_id}
-                    )
-                    
-                    now = datetime.datetime.now().strftime("%H:%M:%S")
-                    print(f"[{now}] [SESSION_CLEANUP] 만료된 세션 정리: {session_id[:16]}...")
-                    
+                ).fetchall()]
+
+                if expired:
+                    _close_sessions(conn, expired, '타임아웃')
+
+            if expired:
+                now = datetime.datetime.now().strftime("%H:%M:%S")
+                print(f"[{now}] [SESSION_CLEANUP] 만료된 세션 {len(expired)}개 정리")
+                for session_id in expired:
+                    _session_expiry.cancel(session_id)
+                _notify_session_expiry(expired)
+
         except Exception as e:
             print(f"[SESSION_CLEANUP] 오류: {e}")
 
 
-def save_login_history(emp_no: str, client_ip: str, status: str, fail_reason: str = None, user_agent: str = None, session_id: str = None, session_type: str = 'TCP', record_anyway: bool = False):
-    """로그인 이력 저장"""
+def save_login_history(emp_no: str, client_ip: str, status: str, fail_reason: str = None, user_agent: str = None, session_id: str = None, session_type: str = 'TCP'):
+    """
+    로그인 이력 저장 (write-behind)
+    - 인증 실패 기록용 (성공 기록은 verify_user 의 세션 생성 트랜잭션에서 함께 INSERT)
+    """
     try:
-        # 🆕 record_anyway=False이고 임시 세션이면 기록 안 함
-        if not record_anyway:
-            with engine.connect() as conn:
-                if session_id:
-                    is_temp = conn.execute(
-                        text("SELECT is_temporary FROM user_session WHERE session_id = :s LIMIT 1"),
-                        {"s": session_id}
-                    ).scalar()
-                    
-                    if is_temp:
-                        return  # 임시 세션은 히스토리에 기록 안 함
-        
-        with engine.begin() as conn:
-            # 중복 체크
-            if status == 'SUCCESS' and session_id:
-                recent = conn.execute(
-                    text("SELECT COUNT(*) FROM login_history WHERE session_id = :sid"),
-                    {"sid": session_id}
-                ).scalar()
-                
-                if recent > 0:
-                    return
-            
-            conn.execute(
-                text("""
-                    INSERT INTO login_history(emp_no, session_id, session_type, client_ip, login_status, fail_reason, user_agent)
-                    VALUES (:e, :sid, :type, :ip, :status, :reason, :agent)
-                """),
-                {
-                    "e": emp_no,
-                    "sid": session_id,
-                    "type": session_type,
-                    "ip": client_ip,
-                    "status": status,
-                    "reason": fail_reason,
-                    "agent": user_agent
-                }
-            )
-            
-            now = datetime.datetime.now().strftime("%H:%M:%S")
-            print(f"[{now}] [LOGIN_HISTORY] ✅ {status} ({session_type}): {emp_no} from {client_ip}")
+        _login_history_writes.submit({
+            "e": emp_no,
+            "sid": session_id,
+            "type": session_type,
+            "ip": client_ip,
+            "status": status,
+            "reason": fail_reason,
+            "agent": user_agent,
+            "t": _now()
+        })
+
+        now = datetime.datetime.now().strftime("%H:%M:%S")
+        print(f"[{now}] [LOGIN_HISTORY] ✅ {status} ({session_type}): {emp_no} from {client_ip}")
     except Exception as e:
         now = datetime.datetime.now().strftime("%H:%M:%S")
         print(f"[{now}] [LOGIN_HISTORY] ❌ 저장 오류: {e}")
 
 
-def save_chat_message(emp_no: str, content: str):
-    """채팅 메시지 저장"""
-    try:
-        with engine.begin() as conn:
-            conn.execute(
-                text("INSERT INTO chat_message(sender_emp_no, content) VALUES (:e, :c)"),
-                {"e": emp_no, "c": content}
-            )
-    except Exception:
-        pass
+def save_chat_message(emp_no: str, content: str, created_at=None, uid=None):
+    """
+    채팅 메시지 저장 (write-behind, created_at 은 초 단위)
+    uid: 메시지 고유 id (msg_uid, 저널에도 함께 기록되어 재전송 중복 판정에 사용)
+    """
+    _chat_writes.submit({"uid": uid or uuid.uuid4().hex, "e": emp_no, "c": content, "t": created_at or _now()})
+
+
+def _chat_rows(rows):
+    return [{"uid": row[0], "emp_no": row[1], "content": row[2], "created_at": row[3]} for row in rows]
+
+
+def get_recent_chat_messages(limit=50):
+    """최근 채팅 메시지 (오래된 것부터)"""
+    with engine.connect() as conn:
+        rows = conn.execute(
+            text("""
+                SELECT msg_uid, sender_emp_no, content, created_at FROM chat_message
+                ORDER BY created_at DESC, id DESC
+                LIMIT :limit
+            """),
+            {"limit": limit}
+        ).fetchall()
+    return _chat_rows(reversed(rows))
+
+
+def get_chat_messages_before(before_uid, limit=50):
+    """msg_uid 가 before_uid 인 메시지보다 이전 메시지 (keyset: (created_at, id) 기준, 오래된 것부터)"""
+    with engine.connect() as conn:
+        rows = conn.execute(
+            text("""
+                SELECT m.msg_uid, m.sender_emp_no, m.content, m.created_at
+                FROM chat_message m
+                JOIN chat_message b ON b.msg_uid = :before_uid
+                WHERE m.created_at < b.created_at
+                   OR (m.created_at = b.created_at AND m.id < b.id)
+                ORDER BY m.created_at DESC, m.id DESC
+                LIMIT :limit
+            """),
+            {"before_uid": before_uid, "limit": limit}
+        ).fetchall()
+    return _chat_rows(reversed(rows))
+
+
+def save_environment_log(temperature, humidity, log_type='scheduled', recorded_at=None):
+    """온습도 기록 저장 (write-behind)"""
+    recorded_at = recorded_at.replace(tzinfo=None, microsecond=0) if recorded_at else _now()
+    return _environment_writes.submit({
+        "temp": temperature,
+        "hum": humidity,
+        "t": recorded_at,
+        "type": log_type
+    })
 
 
 def get_active_sessions():
@@ -535,30 +1018,80 @@ def get_login_statistics(days=7):
 
 def save_barcode_detection(barcode_data, product_name, confidence, image_filename, bbox):
     """바코드 검출 저장"""
+    save_barcode_detections([{
+        "barcode": barcode_data,
+        "product": product_name,
+        "conf": confidence,
+        "filename": image_filename,
+        "bbox": bbox,
+        "detected_at": _now(),
+    }])
+
+
+def save_barcode_detections(rows):
+    """
+    바코드 검출 여러 건 저장 (write-behind 큐에 추가)
+    rows: [{"barcode", "product", "conf", "filename", "bbox", "detected_at"}, ...]
+    """
+    if not rows:
+        return True
     try:
         from config import BARCODE_IMAGE_DIR
-        
-        with engine.begin() as conn:
-            conn.execute(
-                text("""
-                    INSERT INTO barcode_detection_log
-                    (barcode, product_name, confidence, image_path, image_filename, bbox_x1, bbox_y1, bbox_x2, bbox_y2)
-                    VALUES (:barcode, :product, :conf, :path, :filename, :x1, :y1, :x2, :y2)
-                """),
-                {
-                    "barcode": barcode_data,
-                    "product": product_name,
-                    "conf": confidence,
-                    "path": f"{BARCODE_IMAGE_DIR}/{image_filename}",
-                    "filename": image_filename,
-                    "x1": bbox[0] if bbox else None,
-                    "y1": bbox[1] if bbox else None,
-                    "x2": bbox[2] if bbox else None,
-                    "y2": bbox[3] if bbox else None
-                }
-            )
-    except Exception:
-        pass
+
+        ok = True
+        for row in rows:
+            bbox = row.get("bbox")
+            filename = row.get("filename")
+            ok = _barcode_writes.submit({
+                "barcode": row["barcode"],
+                "product": row["product"],
+                "conf": row["conf"],
+                "path": row.get("path") or (f"{BARCODE_IMAGE_DIR}/{filename}" if filename else None),
+                "filename": filename,
+                "detected_at": row["detected_at"].replace(microsecond=0),
+                "x1": bbox[0] if bbox else None,
+                "y1": bbox[1] if bbox else None,
+                "x2": bbox[2] if bbox else None,
+                "y2": bbox[3] if bbox else None
+            }) and ok
+        return ok
+    except Exception as e:
+        print(f"[DB] 바코드 검출 저장 요청 오류 ({len(rows)}건): {e}")
+        return False
+
+
+def clear_barcode_image_refs(filenames, chunk_size=500):
+    """정리(삭제)된 이미지를 가리키는 검출 로그의 image_path / image_filename 을 NULL 로"""
+    if not filenames:
+        return 0
+    flush_write_behind("barcode_detection_log")
+    cleared = 0
+    stmt = text("""
+        UPDATE barcode_detection_log
+        SET image_path = NULL, image_filename = NULL
+        WHERE image_filename IN :names
+    """).bindparams(bindparam("names", expanding=True))
+    with engine.begin() as conn:
+        for i in range(0, len(filenames), chunk_size):
+            result = conn.execute(stmt, {"names": list(filenames[i:i + chunk_size])})
+            cleared += result.rowcount
+    return cleared
+
+
+def update_barcode_image_paths(moves, chunk_size=500):
+    """이동한 이미지의 검출 로그 image_path 갱신 (moves: [(파일 이름, 새 경로), ...])"""
+    if not moves:
+        return 0
+    flush_write_behind("barcode_detection_log")
+    stmt = text("""
+        UPDATE barcode_detection_log
+        SET image_path = :path
+        WHERE image_filename = :name
+    """)
+    with engine.begin() as conn:
+        for i in range(0, len(moves), chunk_size):
+            conn.execute(stmt, [{"name": name, "path": path} for name, path in moves[i:i + chunk_size]])
+    return len(moves)
 
 
 def get_barcode_detections_with_images(limit=50, barcode=None):
@@ -569,7 +1102,7 @@ def get_barcode_detections_with_images(limit=50, barcode=None):
                 SELECT id, barcode, product_name, confidence, 
                        image_path, image_filename, detected_at,
                        bbox_x1, bbox_y1, bbox_x2, bbox_y2
-                FROM barcode_detection_log WHERE 1=1
+                FROM barcode_detection_log WHERE image_filename IS NOT NULL
             """
             params = {}
             
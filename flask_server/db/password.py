@@ -0,0 +1,197 @@
+"""
+비밀번호 검증 프로세스 풀 (bcrypt)
+- bcrypt.checkpw (cost 12, 약 250ms) 를 채팅 핸들러 스레드/DB 트랜잭션 밖의 별도 프로세스에서 실행
+- 동시에 받을 수 있는 검증 요청 수(실행 중 + 대기)를 제한, 넘치면 기다리지 않고 AuthBusy
+  → 서버 재시작 후 MFC 클라이언트가 한꺼번에 재접속해도 CPU/DB 연결이 묶이지 않음
+- 검증에 성공한 자격 증명은 짧은 시간(TTL) 캐시 → 빠른 재접속은 bcrypt 를 다시 돌리지 않음
+  키: (사원번호, HMAC(비밀번호), 저장된 해시) - 평문 비밀번호는 메모리에 남기지 않고,
+  비밀번호가 바뀌면(해시가 달라지면) 자동으로 캐시 무효
+- 워커 프로세스가 죽어 풀이 깨지면 다음 요청에서 새 풀 생성, 그 사이 요청은 AuthBusy (인증 실패로 답하지 않음)
+"""
+import atexit
+import hashlib
+import hmac
+import os
+import threading
+import time
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures import TimeoutError as FutureTimeoutError
+from concurrent.futures.process import BrokenProcessPool
+import bcrypt
+from config import AUTH_WORKERS, AUTH_QUEUE_LIMIT, AUTH_TIMEOUT, AUTH_CACHE_TTL
+
+
+class AuthBusy(Exception):
+    """검증 요청이 한도를 넘어 바로 거절됨 (잠시 후 재시도)"""
+
+
+def _checkpw(password, pwd_hash):
+    """워커 프로세스: bcrypt 검증"""
+    return bcrypt.checkpw(password, pwd_hash)
+
+
+class PasswordVerifier:
+    """크기 제한 프로세스 풀 + 입장 제한 + 성공 캐시"""
+
+    def __init__(self, workers=AUTH_WORKERS, queue_limit=AUTH_QUEUE_LIMIT,
+                 timeout=AUTH_TIMEOUT, cache_ttl=AUTH_CACHE_TTL):
+        self.workers = workers
+        self.queue_limit = queue_limit
+        self.timeout = timeout
+        self.cache_ttl = cache_ttl
+
+        # 실행 중(workers) + 대기(queue_limit) 까지만 받음
+        self._slots = threading.BoundedSemaphore(workers + queue_limit)
+        self._executor = None
+        self._secret = os.urandom(32)  # 프로세스마다 새로 (재시작하면 캐시도 무효)
+
+        self.lock = threading.Lock()
+        self._cache = {}  # (emp_no, HMAC(비밀번호), 해시) → 만료 시각
+        self.in_flight = 0
+        self.peak_in_flight = 0
+        self.verified = 0
+        self.cache_hits = 0
+        self.rejected = 0
+        self.timeouts = 0
+        self.pool_restarts = 0
+        self.total_time = 0.0
+        self._closed = False
+        atexit.register(self.close)
+
+    def _get_executor(self):
+        if self._executor is None:
+            with self.lock:
+                if self._executor is None:
+                    # spawn: 스레드가 많은 서버 프로세스를 fork 하지 않음
+                    self._executor = ProcessPoolExecutor(
+                        max_workers=self.workers, mp_context=multiprocessing.get_context("spawn")
+                    )
+                    print(f"[INIT] 비밀번호 검증 프로세스 풀 시작: {self.workers}개 프로세스")
+        return self._executor
+
+    def _drop_executor(self, executor):
+        """깨진 풀 버림 → 다음 _get_executor() 에서 새로 생성"""
+        with self.lock:
+            if self._executor is not executor:
+                return  # 다른 요청이 이미 교체함
+            self._executor = None
+            self.pool_restarts += 1
+        executor.shutdown(wait=False)
+        print(f"[AUTH] ❌ 비밀번호 검증 워커 프로세스 종료 감지 → 프로세스 풀 재생성 예정 ({self.pool_restarts}회)")
+
+    def _cache_key(self, emp_no, password, pwd_hash):
+        digest = hmac.new(self._secret, password.encode("utf-8"), hashlib.sha256).digest()
+        return emp_no, digest, pwd_hash
+
+    def _cached(self, key):
+        now = time.time()
+        with self.lock:
+            expires = self._cache.get(key)
+            if expires is None:
+                return False
+            if expires <= now:
+                del self._cache[key]
+                return False
+            self.cache_hits += 1
+            return True
+
+    def _remember(self, key):
+        now = time.time()
+        with self.lock:
+            # 만료된 항목 정리 (재접속 폭주 중에도 크기가 계속 늘지 않도록)
+            if len(self._cache) > 1024:
+                for k in [k for k, expires in self._cache.items() if expires <= now]:
+                    del self._cache[k]
+            self._cache[key] = now + self.cache_ttl
+
+    def verify(self, emp_no, password, pwd_hash):
+        """비밀번호 검증 → True/False (한도 초과면 AuthBusy)"""
+        key = self._cache_key(emp_no, password, pwd_hash) if self.cache_ttl else None
+        if key and self._cached(key):
+            return True
+
+        if not self._slots.acquire(blocking=False):
+            with self.lock:
+                self.rejected += 1
+            raise AuthBusy("비밀번호 검증 대기열 가득 참")
+
+        started = time.time()
+        with self.lock:
+            self.in_flight += 1
+            self.peak_in_flight = max(self.peak_in_flight, self.in_flight)
+        executor = self._get_executor()
+        try:
+            future = executor.submit(_checkpw, password.encode("utf-8"), pwd_hash.encode("utf-8"))
+        except BrokenProcessPool:
+            self._release(started)
+            self._drop_executor(executor)
+            raise AuthBusy("비밀번호 검증 프로세스 풀 재시작 중")
+        except Exception:
+            self._release(started)
+            raise
+        # 슬롯은 워커 프로세스의 bcrypt 가 실제로 끝날 때 반납 (시간 초과로 먼저 돌아가도 한도 유지)
+        future.add_done_callback(lambda _future: self._release(started))
+
+        try:
+            ok = future.result(timeout=self.timeout)
+        except FutureTimeoutError:
+            future.cancel()
+            with self.lock:
+                self.timeouts += 1
+            raise AuthBusy("비밀번호 검증 시간 초과")
+        except BrokenProcessPool:
+            self._drop_executor(executor)
+            raise AuthBusy("비밀번호 검증 프로세스 풀 재시작 중")
+
+        if ok and key:
+            self._remember(key)
+        return ok
+
+    def _release(self, started):
+        with self.lock:
+            self.in_flight -= 1
+            self.verified += 1
+            self.total_time += time.time() - started
+        self._slots.release()
+
+    def stats(self):
+        with self.lock:
+            return {
+                "workers": self.workers,
+                "queue_limit": self.queue_limit,
+                "in_flight": self.in_flight,
+                "peak_in_flight": self.peak_in_flight,
+                "verified": self.verified,
+                "cache_entries": len(self._cache),
+                "cache_hits": self.cache_hits,
+                "rejected": self.rejected,
+                "timeouts": self.timeouts,
+                "pool_restarts": self.pool_restarts,
+                "avg_verify_ms": round(self.total_time / (self.verified or 1) * 1000, 1),
+            }
+
+    def close(self):
+        if self._closed:
+            return
+        self._closed = True
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+
+
+# 전역 검증기 (프로세스 풀은 첫 검증 때 시작)
+_verifier = None
+_verifier_lock = threading.Lock()
+
+
+def get_password_verifier():
+    global _verifier
+    if _verifier is None:
+        with _verifier_lock:
+            if _verifier is None:
+                _verifier = PasswordVerifier()
+    return _verifier
+
+
+def get_password_verifier_stats():
+    return _verifier.stats() if _verifier else None
@@ -0,0 +1,76 @@
+"""
+DB 커넥션 풀 (SQLAlchemy QueuePool + 체크아웃 지표)
+- 모든 DB 접근은 db.manager.engine 하나를 통해서만 (풀 크기 = 서버 전체 DB 동시성)
+- 체크아웃 대기 시간 / 동시 사용 수 / 포화 횟수 / 타임아웃을 집계해서 /stats 로 노출
+"""
+import threading
+import time
+from sqlalchemy.pool import QueuePool
+from sqlalchemy.exc import TimeoutError as PoolTimeoutError
+
+
+class MeteredQueuePool(QueuePool):
+    """체크아웃 지연/포화 지표를 모으는 QueuePool"""
+
+    # 체크아웃 대기 히스토그램 구간 (ms)
+    BUCKETS_MS = (1, 5, 20, 100, 500, 1000)
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._metrics_lock = threading.Lock()
+        self.checkouts = 0
+        self.timeouts = 0
+        self.saturated = 0  # 풀(+overflow)이 모두 사용 중이라 기다려야 했던 체크아웃
+        self.total_wait = 0.0
+        self.max_wait = 0.0
+        self.peak_in_use = 0
+        self.histogram = [0] * (len(self.BUCKETS_MS) + 1)
+
+    def _capacity(self):
+        return self.size() + max(0, self._max_overflow)
+
+    def _do_get(self):
+        saturated = self._max_overflow >= 0 and self.checkedout() >= self._capacity()
+        started = time.perf_counter()
+        try:
+            conn = super()._do_get()
+        except PoolTimeoutError:
+            with self._metrics_lock:
+                self.timeouts += 1
+            raise
+        waited = time.perf_counter() - started
+
+        in_use = self.checkedout()
+        waited_ms = waited * 1000
+        bucket = next((i for i, b in enumerate(self.BUCKETS_MS) if waited_ms <= b), len(self.BUCKETS_MS))
+        with self._metrics_lock:
+            self.checkouts += 1
+            self.total_wait += waited
+            self.max_wait = max(self.max_wait, waited)
+            self.peak_in_use = max(self.peak_in_use, in_use)
+            self.histogram[bucket] += 1
+            if saturated:
+                self.saturated += 1
+        return conn
+
+    def metrics(self):
+        labels = [f"<={b}ms" for b in self.BUCKETS_MS] + [f">{self.BUCKETS_MS[-1]}ms"]
+        capacity = self._capacity()
+        in_use = self.checkedout()
+        with self._metrics_lock:
+            checkouts = self.checkouts or 1
+            return {
+                "pool_size": self.size(),
+                "max_overflow": self._max_overflow,
+                "in_use": in_use,
+                "idle": self.checkedin(),
+                "overflow": self.overflow(),
+                "saturation": round(in_use / capacity, 3) if capacity else None,
+                "peak_in_use": self.peak_in_use,
+                "checkouts": self.checkouts,
+                "saturated_checkouts": self.saturated,
+                "timeouts": self.timeouts,
+                "avg_checkout_ms": round(self.total_wait / checkouts * 1000, 3),
+                "max_checkout_ms": round(self.max_wait * 1000, 3),
+                "checkout_histogram": dict(zip(labels, self.histogram)),
+            }
@@ -4,27 +4,33 @@
 import sys
 import threading
 import logging
-from chat.server import start_tcp_server
-from web.flask_app import app
-from db.manager import init_session_table, engine, session_cleanup_worker
 from config import HTTP_PORT
 
 # Flask 로깅 조정
 log = logging.getLogger('werkzeug')
 log.setLevel(logging.ERROR)
 
-# 🆕 모듈화된 라우트만 import (routes.py 제거)
-import web.routes.video     # 카메라 업로드
-import web.routes.api       # API 엔드포인트
-import web.routes.dashboard # 대시보드
-import web.routes.internal  # 내부 페이지
+# ⚠️ 서버 모듈(Flask 앱, 스레드, 스케줄러)은 __main__ 에서만 import
+#    바코드 디코딩 프로세스 풀(spawn)의 워커가 이 파일을 다시 import 해도
+#    워커 프로세스에서 서버가 중복 시작되지 않도록 하기 위함
+if __name__ == "__main__":
+    from chat.server import start_tcp_server
+    from web.flask_app import app, camera_registry
+    from db.manager import init_session_table, engine, session_cleanup_worker, flush_write_behind, start_journal_replayer
+    from db.manager import flush_session_activity, start_session_expiry
+
+    # 🆕 모듈화된 라우트만 import (routes.py 제거)
+    import web.routes.video     # 카메라 업로드
+    import web.routes.api       # API 엔드포인트
+    import web.routes.dashboard # 대시보드
+    import web.routes.internal  # 내부 페이지
 
 def run_flask():
     """Flask 서버 실행"""
     print(f"[HTTP] Flask 서버 시작: http://0.0.0.0:{HTTP_PORT}")
     print(f"[HTTP] 통합 대시보드: http://localhost:{HTTP_PORT}/dashboard")
-    print(f"[HTTP] 카메라 1: /upload_frame_1")
-    print(f"[HTTP] 카메라 2: /upload_frame_2")
+    for camera in camera_registry:
+        print(f"[HTTP] {camera.name}: /upload_frame/{camera.cam_id}")
     app.run(host="0.0.0.0", port=HTTP_PORT, debug=False, threaded=True)
 
 if __name__ == "__main__":
@@ -36,10 +42,16 @@ if __name__ == "__main__":
         # 세션 테이블 초기화
         init_session_table()
         
-        # 세션 정리 워커 시작
+        # 세션 만료 스케줄러 시작 (활성 세션 deadline 등록)
+        start_session_expiry()
+
+        # 세션 정리 워커 시작 (안전망)
         cleanup_thread = threading.Thread(target=session_cleanup_worker, daemon=True)
         cleanup_thread.start()
         print("[DB] 세션 정리 워커 시작")
+
+        # DB 장애 중 저널에 남은 기록 재전송
+        start_journal_replayer()
         
         # TCP 채팅 서버 시작
         tcp_thread = threading.Thread(target=start_tcp_server, daemon=True)
@@ -50,6 +62,10 @@ if __name__ == "__main__":
         
     except KeyboardInterrupt:
         print("\n[SYSTEM] 서버 종료 중...")
+        # 대기 중인 로그 INSERT 저장
+        flush_session_activity()
+        flushed = flush_write_behind()
+        print(f"[SYSTEM] 대기 중이던 DB 기록 {flushed}건 저장")
         sys.exit(0)
     except Exception as e:
         print(f"[ERROR] 서버 시작 실패: {e}")
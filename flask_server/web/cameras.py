@@ -0,0 +1,160 @@
+"""
+카메라 레지스트리 (카메라별 프레임 슬롯 / 락 / 통계)
+- 카메라 추가는 config.CAMERAS 항목 추가만으로 처리
+- 카메라마다 독립된 락을 사용하므로 카메라끼리 서로 경합하지 않음
+"""
+import threading
+import time
+import datetime
+from config import UPLOAD_LOG_INTERVAL, BARCODE_ROI, BARCODE_DECODE_SCALE, BARCODE_DECODER_STAGES
+
+# MJPEG multipart 파트 헤더 (boundary=frame)
+MJPEG_PART_HEADER = b'--frame\r\nContent-Type: image/jpeg\r\n\r\n'
+
+
+def build_mjpeg_chunk(jpeg_bytes):
+    """JPEG 1장을 multipart 파트 하나로 감싼 bytes (불변 → 모든 뷰어가 공유)"""
+    return b''.join((MJPEG_PART_HEADER, jpeg_bytes, b'\r\n'))
+
+
+class CameraSlot:
+    """카메라 1대의 최신 프레임 슬롯 + 업로드 통계"""
+
+    def __init__(self, cam_id, name=None, label="", device="", ip="", purpose="", detection=False,
+                 roi=BARCODE_ROI, decode_scale=BARCODE_DECODE_SCALE,
+                 decoder_stages=BARCODE_DECODER_STAGES, **options):
+        self.cam_id = str(cam_id)
+        self.name = name or f"카메라 {self.cam_id}"
+        self.label = label
+        self.device = device
+        self.ip = ip
+        self.purpose = purpose
+        self.detection = bool(detection)
+        self.roi = tuple(roi) if roi else None
+        self.decode_scale = decode_scale
+        self.decoder_stages = tuple(decoder_stages)
+        self.options = options
+
+        self.lock = threading.Lock()
+        # 새 프레임 알림 (seq 증가 시 notify_all → 대기 중인 뷰어가 깨어남)
+        self.frame_ready = threading.Condition(self.lock)
+        self.frame = None
+        self.chunk = None  # 프레임당 1번만 만든 multipart 파트
+        self.seq = 0
+        self.last_frame_time = 0
+        self.frame_size = 0
+
+        # 업로드 통계
+        self.total_frames = 0
+        self.total_bytes = 0
+        self.fps = 0.0
+        self._window_count = 0
+        self._window_start = time.time()
+        self._last_log_time = 0
+
+    def update(self, frame_bytes):
+        """프레임 업데이트 (+ UPLOAD_LOG_INTERVAL 마다 수신 로그)"""
+        now = time.time()
+        size = len(frame_bytes) if frame_bytes else 0
+        chunk = build_mjpeg_chunk(frame_bytes) if frame_bytes else None
+        log_line = None
+
+        with self.lock:
+            self.frame = frame_bytes
+            self.chunk = chunk
+            self.seq += 1
+            self.last_frame_time = now
+            self.frame_size = size
+            self.total_frames += 1
+            self.total_bytes += size
+            self._window_count += 1
+            self.frame_ready.notify_all()
+
+            if now - self._last_log_time >= UPLOAD_LOG_INTERVAL:
+                elapsed = now - self._window_start
+                self.fps = self._window_count / elapsed if elapsed > 0 else 0
+                log_line = (f"[📹 {self.name}] 프레임 수신 중 "
+                            f"(크기: {size:,}B, FPS: ~{self.fps:.1f}, 누적: {self._window_count})")
+                self._last_log_time = now
+                self._window_count = 0
+                self._window_start = now
+
+        if log_line:
+            print(f"[{datetime.datetime.now():%H:%M:%S}] {log_line}")
+
+    def latest(self):
+        """최신 프레임 (없으면 None)"""
+        with self.lock:
+            return self.frame
+
+    def wait_for_chunk(self, last_seq, timeout=None):
+        """
+        last_seq 보다 새로운 프레임이 들어올 때까지 대기 후 (seq, chunk) 반환.
+        timeout 동안 새 프레임이 없으면 seq == last_seq 인 현재 상태를 그대로 반환.
+        chunk 는 update() 에서 만든 공유 객체이므로 뷰어별 복사가 없음.
+        """
+        with self.frame_ready:
+            self.frame_ready.wait_for(lambda: self.seq != last_seq, timeout)
+            return self.seq, self.chunk
+
+    def detection_options(self):
+        """검출 함수에 넘길 카메라별 디코딩 설정"""
+        return {"roi": self.roi, "decode_scale": self.decode_scale, "decoder_stages": self.decoder_stages}
+
+    def frame_age(self):
+        """프레임 age (초), 수신 이력이 없으면 -1"""
+        if self.last_frame_time == 0:
+            return -1
+        return time.time() - self.last_frame_time
+
+    def snapshot(self):
+        """통계/상태 스냅샷"""
+        with self.lock:
+            return {
+                "cam_id": self.cam_id,
+                "name": self.name,
+                "label": self.label,
+                "detection": self.detection,
+                "seq": self.seq,
+                "last_frame_age_sec": self.frame_age(),
+                "latest_frame_size": self.frame_size,
+                "fps": round(self.fps, 1),
+                "total_frames": self.total_frames,
+                "total_bytes": self.total_bytes,
+            }
+
+
+class CameraRegistry:
+    """cam_id → CameraSlot 매핑 (생성 후 구성은 고정, 슬롯별 락만 사용)"""
+
+    def __init__(self, camera_configs):
+        self._cameras = {}
+        for cam_id, cfg in camera_configs.items():
+            slot = CameraSlot(cam_id, **cfg)
+            self._cameras[slot.cam_id] = slot
+
+    def get(self, cam_id):
+        return self._cameras.get(str(cam_id))
+
+    def __contains__(self, cam_id):
+        return str(cam_id) in self._cameras
+
+    def __iter__(self):
+        return iter(self._cameras.values())
+
+    def __len__(self):
+        return len(self._cameras)
+
+    def ids(self):
+        return list(self._cameras.keys())
+
+    def default(self):
+        """기본 카메라 (설정상 첫 번째)"""
+        return next(iter(self._cameras.values()), None)
+
+    def detection_cameras(self):
+        """바코드 검출이 활성화된 카메라 목록"""
+        return [cam for cam in self._cameras.values() if cam.detection]
+
+    def snapshot(self):
+        return {cam.cam_id: cam.snapshot() for cam in self._cameras.values()}
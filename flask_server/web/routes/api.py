@@ -4,13 +4,13 @@ API 엔드포인트 (서버는 컨베이어 '원하는 상태'만 관리)
   run=True(동작) / False(정지)에 맞춰 로컬에서 2.0s 전진 → 1.5s 정지 루프를 제어.
 """
 
-from flask import jsonify, request, send_from_directory, abort, session
+from flask import jsonify, request, send_file, session, Response
 import os
 import datetime
 import threading
 
 # 기존 Flask 앱과 유틸 가져오기 (새 Flask() 만들지 말 것!)
-from web.flask_app import app, get_frame_age, get_frame_size
+from web.flask_app import app, camera_registry, get_frame_age, get_frame_size
 
 # DB/통계 관련 매니저
 from db.manager import (
@@ -20,26 +20,43 @@ from db.manager import (
     get_login_statistics,
     get_barcode_detections_with_images,
     update_session_activity,
+    get_write_behind_stats,
+    get_journal_stats,
+    get_pool_stats,
+    get_session_activity_stats,
+    get_session_expiry_stats,
 )
+from db.password import get_password_verifier_stats
 
 # 채팅 서버 접속자 수
-from chat.server import get_connected_clients_count
+from chat.server import get_connected_clients_count, get_chat_stats
 
 # 설정값
 from config import (
     BARCODE_DETECTION_INTERVAL,
     BARCODE_COOLDOWN,
     CONFIDENCE_THRESHOLD,
-    BARCODE_IMAGE_DIR,
+    BARCODE_DETECTION_MODE,
 )
 
 # 바코드 통계
 from barcode.detector import (
     get_barcode_stats,
+    get_decode_pool_stats,
+    get_cascade_stats,
+    get_detector_stats,
+    get_detection_totals,
     BARCODE_DETECTION_AVAILABLE,
-    barcode_detection_count,
-    rejected_barcode_count,
 )
+from barcode.worker import get_detection_worker_stats
+from barcode.image_writer import get_image_writer_stats
+from barcode.image_store import get_image_store
+from barcode.image_writer import ensure_thumbnail
+from barcode.image_cache import image_cache
+from config import BARCODE_THUMB_WIDTH
+
+# 저장된 검출 이미지는 바뀌지 않음 (파일 이름 = 검출 시각 + 바코드)
+IMMUTABLE_CACHE_CONTROL = "public, max-age=31536000, immutable"
 
 # =========================
 # 환경 데이터 (온/습도) 저장소
@@ -61,6 +78,8 @@ def before_request_handler():
         # 정적 이미지/스트림 등은 업데이트 제외
         if request.path.startswith("/barcode_images/"):
             return None
+        if request.path.startswith("/barcode_thumbs/"):
+            return None
         if request.path.startswith("/video_feed"):
             return None
         if request.path.startswith("/latest_jpeg"):
@@ -99,6 +118,8 @@ def stats():
     with environment_lock:
         env_data = latest_environment.copy()
 
+    barcode_detection_count, rejected_barcode_count = get_detection_totals()
+
     return jsonify({
         "last_frame_age_sec": age,
         "latest_frame_size": sz,
@@ -117,6 +138,22 @@ def stats():
         "confidence_threshold": CONFIDENCE_THRESHOLD,
         "balance_mode": True,
         "environment": env_data,
+        "cameras": camera_registry.snapshot(),
+        "detection_workers": get_detection_worker_stats(),
+        "barcode_detectors": get_detector_stats(),
+        "image_writer": get_image_writer_stats(),
+        "image_store": get_image_store().stats(),
+        "image_cache": image_cache.stats(),
+        "db_write_behind": get_write_behind_stats(),
+        "db_journal": get_journal_stats(),
+        "db_pool": get_pool_stats(),
+        "session_activity": get_session_activity_stats(),
+        "session_expiry": get_session_expiry_stats(),
+        "password_verifier": get_password_verifier_stats(),
+        "chat": get_chat_stats(),
+        "detection_mode": BARCODE_DETECTION_MODE,
+        "decode_pool": get_decode_pool_stats(),
+        "decoder_cascade": get_cascade_stats(),
     })
 
 
@@ -220,29 +257,55 @@ def barcode_stats_route():
         }), 200
 
 
+def _image_etag(filename, variant=""):
+    """강한 ETag: 파일 이름이 곧 내용 버전 (썸네일은 크기 설정까지 포함)"""
+    stem = os.path.splitext(os.path.basename(filename))[0]
+    return f"{stem}{variant}"
+
+
+def _not_modified(etag):
+    """If-None-Match 가 일치하면 디스크 접근 없이 304"""
+    if etag in request.if_none_match:
+        response = Response(status=304)
+        response.set_etag(etag)
+        response.headers["Cache-Control"] = IMMUTABLE_CACHE_CONTROL
+        return response
+    return None
+
+
+def _image_response(data, path, etag):
+    """
+    캐시에 있으면 메모리에서, 없으면 파일을 send_file 로 (Range 지원)
+    send_file 은 WSGI 서버의 file_wrapper(sendfile) 또는 X-Sendfile(USE_X_SENDFILE) 사용
+    - ETag 를 먼저 정해야 조건부 요청(If-None-Match / If-Range)이 같은 ETag 로 판정됨
+    """
+    if data is not None:
+        response = Response(data, mimetype="image/jpeg")
+        response.set_etag(etag)
+        response.make_conditional(request.environ, accept_ranges=True, complete_length=len(data))
+    else:
+        response = send_file(path, mimetype="image/jpeg", conditional=True, etag=etag)
+    response.headers["Cache-Control"] = IMMUTABLE_CACHE_CONTROL
+    return response
+
+
 @app.route("/barcode_images/<path:filename>")
 def serve_barcode_image(filename):
-    """바코드 이미지 제공"""
+    """바코드 이미지 제공 (저장소 인덱스로 조회, 경로는 파일 이름 형식에서만 생성)"""
     try:
-        abs_dir = os.path.abspath(BARCODE_IMAGE_DIR)
-        if not os.path.exists(abs_dir):
-            print(f"[IMAGE] ❌ 디렉토리 없음: {abs_dir}")
-            return "Image directory not found", 404
-
-        safe_filename = os.path.basename(filename)
-        filepath = os.path.join(abs_dir, safe_filename)
-        if not os.path.exists(filepath):
-            print(f"[IMAGE] ❌ 파일 없음: {safe_filename}")
+        etag = _image_etag(filename)
+        cached = _not_modified(etag)
+        if cached is not None:
+            return cached
+
+        found = get_image_store().resolve(filename)
+        if found is None:
+            print(f"[IMAGE] ❌ 파일 없음: {os.path.basename(filename)}")
             return "Image not found", 404
 
-        real_path = os.path.realpath(filepath)
-        real_dir = os.path.realpath(abs_dir)
-        if not real_path.startswith(real_dir):
-            print("[IMAGE] ❌ 보안 위반")
-            return "Access denied", 403
-
-        print(f"[IMAGE] ✅ 서빙: {safe_filename}")
-        return send_from_directory(directory=abs_dir, path=safe_filename, mimetype="image/jpeg")
+        directory, safe_filename = found
+        data = image_cache.get("image", safe_filename)
+        return _image_response(data, os.path.join(directory, safe_filename), etag)
 
     except Exception as e:
         print(f"[IMAGE] ❌ 오류: {e}")
@@ -251,6 +314,29 @@ def serve_barcode_image(filename):
         return f"Server error: {str(e)}", 500
 
 
+@app.route("/barcode_thumbs/<path:filename>")
+def serve_barcode_thumb(filename):
+    """갤러리용 썸네일 (없으면 원본에서 생성 후 저장)"""
+    try:
+        etag = _image_etag(filename, f"-t{BARCODE_THUMB_WIDTH}")
+        cached = _not_modified(etag)
+        if cached is not None:
+            return cached
+
+        data = image_cache.get("thumb", os.path.basename(filename))
+        thumb_path = None
+        if data is None:
+            thumb_path = ensure_thumbnail(filename)
+            if thumb_path is None:
+                return "Image not found", 404
+
+        return _image_response(data, thumb_path, etag)
+
+    except Exception as e:
+        print(f"[IMAGE] ❌ 썸네일 오류: {e}")
+        return f"Server error: {str(e)}", 500
+
+
 @app.route("/api/barcode_detections_with_images")
 def api_barcode_detections_with_images():
     """바코드 검출 이력 (이미지 포함)"""
@@ -285,14 +371,15 @@ def api_login_statistics():
 def test_barcode_now():
     """바코드 검출 강제 실행 (테스트용)"""
     try:
-        from web.flask_app import get_latest_frame_1
-        from barcode.detector import detect_balanced_barcodes
+        from barcode.detector import get_detector
 
-        frame = get_latest_frame_1()
+        cam_id = request.args.get("cam_id")
+        camera = camera_registry.get(cam_id) if cam_id else next(iter(camera_registry.detection_cameras()), None)
+        frame = camera.latest() if camera else None
         if not frame:
             return jsonify({"success": False, "error": "프레임 없음"}), 200
 
-        detections = detect_balanced_barcodes(frame, None)
+        detections = get_detector(camera.cam_id, **camera.detection_options()).detect(frame, None)
         return jsonify({
             "success": True,
             "detections_count": len(detections),
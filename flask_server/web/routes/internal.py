@@ -1,7 +1,7 @@
 """
 내부용 페이지 라우트 (대시보드 iframe용)
 """
-from web.flask_app import app
+from web.flask_app import app, camera_registry
 
 @app.route("/_internal/barcode_dashboard")
 def internal_barcode_dashboard():
@@ -181,10 +181,17 @@ def internal_barcode_gallery():
         </div>
         
         <script>
+            let lastGalleryKey = null;
+
             function loadGallery() {
                 fetch('/api/barcode_detections_with_images?limit=100')
                     .then(response => response.json())
                     .then(data => {
+                        // 목록이 그대로면 다시 그리지 않음
+                        const galleryKey = data.detections.map(item => item.id).join(',');
+                        if (galleryKey === lastGalleryKey) return;
+                        lastGalleryKey = galleryKey;
+
                         const gallery = document.getElementById('gallery');
                         gallery.innerHTML = '';
                         
@@ -198,10 +205,12 @@ def internal_barcode_gallery():
                             card.className = 'gallery-item';
                             
                             const imgUrl = `/barcode_images/${item.image_filename}`;
+                            const thumbUrl = `/barcode_thumbs/${item.image_filename}`;
                             const detectedTime = new Date(item.detected_at).toLocaleString('ko-KR');
                             
                             const img = document.createElement('img');
-                            img.src = imgUrl;
+                            img.src = thumbUrl;
+                            img.loading = 'lazy';
                             img.alt = item.barcode;
                             img.style.cursor = 'pointer';
                             
@@ -691,7 +700,9 @@ def internal_stats_page():
 
 @app.route("/_internal/video_feed_page")
 def internal_video_feed_page():
-    """🔒 내부용: 실시간 영상 페이지 (카메라 2개)"""
+    """🔒 내부용: 실시간 영상 페이지 (config.CAMERAS 기준)"""
+    cards = "".join(_video_card_html(camera) for camera in camera_registry)
+    subtitle = " | ".join(f"{camera.name} ({camera.label})" for camera in camera_registry)
     return """
     <!DOCTYPE html>
     <html>
@@ -788,63 +799,46 @@ def internal_video_feed_page():
     <body>
         <div class="header">
             <h2>📹 실시간 영상 모니터링</h2>
-            <p>카메라 1 (바코드 검출) | 카메라 2 (모니터링)</p>
+            <p><!--VIDEO_SUBTITLE--></p>
         </div>
         
         <div class="video-grid">
-            <!-- 카메라 1 -->
-            <div class="video-card">
-                <div class="video-title">
-                    <span class="video-icon">📹</span>
-                    <span>카메라 1 (바코드 검출)</span>
-                </div>
-                <div class="video-container">
-                    <img src="/video_feed_1" alt="카메라 1">
-                </div>
-                <div class="video-info">
-                    <div class="info-item">
-                        <span class="info-label">장치</span>
-                        <span class="info-value">라즈베리파이 #1</span>
-                    </div>
-                    <div class="info-item">
-                        <span class="info-label">IP</span>
-                        <span class="info-value">192.168.0.87</span>
-                    </div>
-                    <div class="info-item">
-                        <span class="info-label">용도</span>
-                        <span class="info-value">바코드 검출 + 센서</span>
-                    </div>
-                </div>
-            </div>
-            
-            <!-- 카메라 2 -->
+            <!--VIDEO_CARDS-->
+        </div>
+    </body>
+    </html>
+    """.replace("<!--VIDEO_CARDS-->", cards).replace("<!--VIDEO_SUBTITLE-->", subtitle)
+
+
+def _video_card_html(camera):
+    """카메라 1대의 영상 카드 HTML"""
+    return f"""
+            <!-- {camera.name} -->
             <div class="video-card">
                 <div class="video-title">
                     <span class="video-icon">📹</span>
-                    <span>카메라 2 (모니터링)</span>
+                    <span>{camera.name} ({camera.label})</span>
                 </div>
                 <div class="video-container">
-                    <img src="/video_feed_2" alt="카메라 2">
+                    <img src="/video_feed/{camera.cam_id}" alt="{camera.name}">
                 </div>
                 <div class="video-info">
                     <div class="info-item">
                         <span class="info-label">장치</span>
-                        <span class="info-value">라즈베리파이 #2</span>
+                        <span class="info-value">{camera.device}</span>
                     </div>
                     <div class="info-item">
                         <span class="info-label">IP</span>
-                        <span class="info-value">192.168.0.26</span>
+                        <span class="info-value">{camera.ip}</span>
                     </div>
                     <div class="info-item">
                         <span class="info-label">용도</span>
-                        <span class="info-value">라인 모니터링</span>
+                        <span class="info-value">{camera.purpose}</span>
                     </div>
                 </div>
             </div>
-        </div>
-    </body>
-    </html>
-    """
+"""
+
 
 # internal.py - 환경 데이터 페이지 추가
 